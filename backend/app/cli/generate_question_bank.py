@@ -0,0 +1,69 @@
+"""Pre-generate opening questions for the job templates.
+
+usage: python -m app.cli.generate_question_bank [--templates PATH] [--count N] [--replace]
+
+--templates accepts a json list of {"title", "description"} objects or the
+frontend `jobTemplates.ts` file (default).
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from pathlib import Path
+from sqlmodel import delete
+from ..db.pg_conn import init_db, get_db_session_ctx
+from ..models.question_bank import OpeningQuestion
+from ..services.question_bank import generate_opening_questions, role_fingerprint
+
+DEFAULT_TEMPLATES = (
+    Path(__file__).resolve().parents[3] / "frontend/src/constants/jobTemplates.ts"
+)
+
+
+def load_templates(path: Path) -> list[dict]:
+    text = path.read_text()
+    if path.suffix == ".json":
+        return json.loads(text)
+
+    return [
+        {"title": title, "description": description}
+        for title, description in re.findall(
+            r"title:\s*'([^']+)'.*?description:\s*`([^`]+)`", text, re.S
+        )
+    ]
+
+
+async def main(templates_path: Path, count: int, replace: bool):
+    await init_db()
+    templates = load_templates(templates_path)
+    print(f"[question bank] : {len(templates)} templates from {templates_path}")
+
+    for template in templates:
+        questions = await generate_opening_questions(
+            template["title"], template["description"], count
+        )
+
+        async with get_db_session_ctx() as session:
+            if replace:
+                await session.execute(
+                    delete(OpeningQuestion).where(
+                        OpeningQuestion.role_fingerprint
+                        == role_fingerprint(template["title"], template["description"])
+                    )
+                )
+            session.add_all(questions)
+            await session.commit()
+
+        print(f"[question bank] : {template['title']} -> {len(questions)} questions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pre-generate opening questions")
+    parser.add_argument("--templates", type=Path, default=DEFAULT_TEMPLATES)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument(
+        "--replace", action="store_true", help="drop existing questions per role"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.templates, args.count, args.replace))
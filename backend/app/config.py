@@ -16,9 +16,49 @@ class Settings(BaseSettings):
     SUPABASE_SECRET_KEY: str
     SUPABASE_URL: str
     SPEECHMATICS_API_KEY: str
+    SPEECHMATICS_WEBHOOK_SECRET: str
     INNGEST_DEV: int
     UPSTASH_REDIS_URL: str
     BACKEND_URL: str
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_STREAM_MAX_CONNECTIONS: int = 200
+    REDIS_POOL_TIMEOUT: float = 10
+    REDIS_SOCKET_TIMEOUT: float = 5
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    SPEECHMATICS_CALLBACK_TIMEOUT: int = 180
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_TIMEOUT: float = 60
+    HTTP_MAX_RETRIES: int = 3
+    HTTP_RETRY_BACKOFF: float = 0.5
+    MAX_AUDIO_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    HISTORY_KEEP_EXCHANGES: int = 3
+    HISTORY_TOKEN_BUDGET: int = 1500
+    # 0 disables the expiry / trimming of interview transcripts
+    HISTORY_TTL_SECONDS: int = 12 * 60 * 60
+    HISTORY_MAX_MESSAGES: int = 500
+    PROMPT_CACHE_SIZE: int = 1024
+    META_CACHE_SIZE: int = 1024
+    META_CACHE_TTL: float = 60
+    SPECULATIVE_QUESTIONS: bool = False
+    MIN_SPEECH_SECONDS: float = 0.6
+    SPEECH_RMS_DBFS: float = -45
+    AUDIO_WORKERS: int = 2
+    NORMALIZED_AUDIO_BITRATE: int = 24_000
+    STT_BACKEND: str = "speechmatics"
+    LOCAL_STT_MODEL_PATH: str = "models/faster-whisper-base.en"
+    LOCAL_STT_COMPUTE_TYPE: str = "int8"
+    LOCAL_STT_WORKERS: int = 1
+    LLM_MODEL: str = "gemini-2.5-flash"
+    LLM_FAST_MODEL: str = "gemini-2.5-flash-lite"
+    LLM_STRONG_MODEL: str = "gemini-2.5-pro"
+    LLM_INTERACTIVE_CONCURRENCY: int = 8
+    LLM_BACKGROUND_CONCURRENCY: int = 2
+    LLM_MAX_WAITING: int = 32
+    LLM_INTERACTIVE_MAX_QUEUE_SECONDS: float = 20
+    LLM_BACKGROUND_MAX_QUEUE_SECONDS: float = 120
+    LLM_REQUESTS_PER_MINUTE: int = 120
+    LLM_INTERACTIVE_RESERVE: int = 10
+    LLM_REPAIR_ATTEMPTS: int = 1
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
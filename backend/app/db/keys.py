@@ -0,0 +1,68 @@
+# every key of an interview starts with interview:{<id>}: - the braces are a
+# cluster hash tag, so all of them hash to the same slot and one turn's state
+# can be read with a single MULTI or script. State keys expire
+# INTERVIEW_METADATA_EXPIRY after their last write, locks and drafts sooner.
+#
+#   interview:{id}:meta                        hash    metadata, question counter
+#   interview:{id}:prompt                      string  rendered system prompt
+#   interview:{id}:transcript                  stream  one entry per message
+#   interview:{id}:summary                     hash    compacted history, cursor
+#   interview:{id}:summary:lock                string  compaction lock
+#   interview:{id}:aggregate                   hash    summed answer scores
+#   interview:{id}:suggestions                 list    per-answer suggestions
+#   interview:{id}:chunks                      string  audio chunk counter
+#   interview:{id}:turn:lock                   string  single-flight lock
+#   interview:{id}:turn:{turn_id}[:saved|:scored]      turn result and markers
+#   interview:{id}:answer:{path}               stream  answer status log
+#   interview:{id}:answer:{path}:<field>       string  per-answer bookkeeping
+
+
+def interview_key(interview_id: str, *parts: str) -> str:
+    return ":".join(("interview", f"{{{interview_id}}}", *parts))
+
+
+def meta_key(interview_id: str) -> str:
+    return interview_key(interview_id, "meta")
+
+
+def prompt_key(interview_id: str) -> str:
+    return interview_key(interview_id, "prompt")
+
+
+def transcript_key(interview_id: str) -> str:
+    return interview_key(interview_id, "transcript")
+
+
+def summary_key(interview_id: str) -> str:
+    return interview_key(interview_id, "summary")
+
+
+def summary_lock_key(interview_id: str) -> str:
+    return interview_key(interview_id, "summary", "lock")
+
+
+def aggregate_keys(interview_id: str) -> tuple[str, str]:
+    return (
+        interview_key(interview_id, "aggregate"),
+        interview_key(interview_id, "suggestions"),
+    )
+
+
+def chunk_counter_key(interview_id: str) -> str:
+    return interview_key(interview_id, "chunks")
+
+
+def turn_lock_key(interview_id: str) -> str:
+    return interview_key(interview_id, "turn", "lock")
+
+
+def turn_key(interview_id: str, turn_id: str) -> str:
+    return interview_key(interview_id, "turn", turn_id)
+
+
+def answer_key(interview_id: str, audio_path: str, *parts: str) -> str:
+    return interview_key(interview_id, "answer", audio_path, *parts)
+
+
+def answer_status_key(interview_id: str, audio_path: str) -> str:
+    return answer_key(interview_id, audio_path)
@@ -1,11 +1,64 @@
-import redis
+import redis as sync_redis
+import redis.asyncio as redis
 from ..config import settings
 
-# redis_client = redis.Redis(
-#     host=settings.REDIS_HOST, port=int(settings.REDIS_PORT), decode_responses=True
-# )
+# shared pool for every request handler and inngest function, blocking pool makes
+# callers wait for a free connection instead of failing under bursts
+redis_pool = redis.BlockingConnectionPool.from_url(
+    settings.UPSTASH_REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    decode_responses=True,
+)
 
-redis_client = redis.Redis.from_url(settings.UPSTASH_REDIS_URL)
+redis_client = redis.Redis(connection_pool=redis_pool)
+
+# XREAD BLOCK holds its connection for the whole block window, so status watchers
+# get their own pool (without a socket timeout) and can never starve handlers
+redis_stream_pool = redis.BlockingConnectionPool.from_url(
+    settings.UPSTASH_REDIS_URL,
+    max_connections=settings.REDIS_STREAM_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    decode_responses=True,
+)
+
+redis_stream_client = redis.Redis(connection_pool=redis_stream_pool)
+
+# same settings for the few sync entry points (langchain's sync runnable and
+# chat history apis), the connections are only opened when one is used
+sync_redis_pool = sync_redis.BlockingConnectionPool.from_url(
+    settings.UPSTASH_REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    timeout=settings.REDIS_POOL_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    decode_responses=True,
+)
+
+sync_redis_client = sync_redis.Redis(connection_pool=sync_redis_pool)
 
 AUDIO_METADATA_EXPIRY = 12 * 60 * 60  # 12 hrs
 INTERVIEW_METADATA_EXPIRY = 12 * 60 * 60  # 12 hrs
+
+
+async def init_redis():
+    print(f"[redis connection] : {await redis_client.ping()}")
+
+
+async def close_redis():
+    await redis_client.aclose()
+    await redis_pool.aclose()
+    await redis_stream_client.aclose()
+    await redis_stream_pool.aclose()
+    sync_redis_pool.disconnect()
+
+
+async def redis_health() -> bool:
+    try:
+        return bool(await redis_client.ping())
+    except Exception as e:
+        print("[redis health] :", e)
+        return False
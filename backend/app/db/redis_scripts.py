@@ -0,0 +1,114 @@
+from typing import Optional
+from .redis import redis_client
+
+# multi-command updates on the answer path run as one server side script each,
+# one round trip to upstash per logical operation instead of one per command.
+# redis-py sends EVALSHA and only loads the script (SCRIPT LOAD) when the server
+# doesn't know it yet.
+
+# KEYS: status stream | ARGV: entry json, maxlen, ttl
+APPEND_STATUS_SCRIPT = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[2], '*', 'data', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return id
+"""
+
+# KEYS: aggregate hash, suggestions list
+# ARGV: communication, technical, clarity, suggestion, ttl
+ADD_SCORE_SCRIPT = """
+redis.call('HINCRBYFLOAT', KEYS[1], 'total_comm', ARGV[1])
+redis.call('HINCRBYFLOAT', KEYS[1], 'total_tech', ARGV[2])
+redis.call('HINCRBYFLOAT', KEYS[1], 'total_clarity', ARGV[3])
+local count = redis.call('HINCRBY', KEYS[1], 'count', 1)
+redis.call('RPUSH', KEYS[2], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+return count
+"""
+
+# KEYS: chunk counter | ARGV: ttl
+NEXT_CHUNK_SCRIPT = """
+local chunk = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return chunk
+"""
+
+# KEYS: chunk counter, completion marker | ARGV: chunk number, ttl
+# returns -1 for a chunk that was never allocated, 0 when already completed
+COMPLETE_CHUNK_SCRIPT = """
+local allocated = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > allocated then
+    return -1
+end
+if redis.call('SET', KEYS[2], 1, 'NX', 'EX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+# KEYS: lock | ARGV: owner token
+# only the holder's token releases a lock, never one that expired and was retaken
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# KEYS: lock | ARGV: owner token, ttl
+EXTEND_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+append_status_script = redis_client.register_script(APPEND_STATUS_SCRIPT)
+add_score_script = redis_client.register_script(ADD_SCORE_SCRIPT)
+next_chunk_script = redis_client.register_script(NEXT_CHUNK_SCRIPT)
+complete_chunk_script = redis_client.register_script(COMPLETE_CHUNK_SCRIPT)
+release_lock_script = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+extend_lock_script = redis_client.register_script(EXTEND_LOCK_SCRIPT)
+
+
+async def append_status(key: str, data: str, maxlen: int, ttl: int) -> str:
+    return await append_status_script(keys=[key], args=[data, maxlen, ttl])
+
+
+async def add_score(
+    aggregate_key: str,
+    suggestions_key: str,
+    communication: float,
+    technical: float,
+    clarity: float,
+    suggestion: str,
+    ttl: int,
+) -> int:
+    return await add_score_script(
+        keys=[aggregate_key, suggestions_key],
+        args=[communication, technical, clarity, suggestion, ttl],
+    )
+
+
+async def next_chunk(counter_key: str, ttl: int) -> int:
+    return await next_chunk_script(keys=[counter_key], args=[ttl])
+
+
+async def complete_chunk(
+    counter_key: str, marker_key: str, chunk_number: int, ttl: int
+) -> Optional[bool]:
+    """True for the first completion of an allocated chunk, False for a repeat,
+    None when the chunk was never allocated."""
+    result = await complete_chunk_script(
+        keys=[counter_key, marker_key], args=[chunk_number, ttl]
+    )
+    return None if result < 0 else bool(result)
+
+
+async def release_lock(lock_key: str, token: str) -> bool:
+    return bool(await release_lock_script(keys=[lock_key], args=[token]))
+
+
+async def extend_lock(lock_key: str, token: str, ttl: int) -> bool:
+    """Resets the lock's ttl, False once it is no longer held with `token`."""
+    return bool(await extend_lock_script(keys=[lock_key], args=[token, ttl]))
@@ -1,9 +1,15 @@
 from datetime import datetime, timezone
+from typing import Optional
 
 from sqlmodel import select
 
 from app.db.pg_conn import get_db_session_ctx
-from app.inngest.functions.transcription import append_meta_log
+from app.config import settings
+from app.db.keys import answer_status_key
+from app.services.answer_status import (
+    append_meta_log,
+    record_question_latency,
+)
 from app.models.interview_session import (
     InterviewResults,
     InterviewSession,
@@ -11,37 +17,31 @@ from app.models.interview_session import (
 )
 from ..client import inngest_client
 from inngest import Context, TriggerEvent, Event
-from ...db.redis import redis_client
 from pydantic import BaseModel
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from ...llm.config import (
-    system_prompt,
-    question_parser,
-    llm,
-    parse_interview_json,
-    parse_chat_history,
-    result_evaluation_prompt,
-    format_history,
-    result_parser,
-)
-from ...llm.redis_memory import get_redis_memory
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_core.messages import HumanMessage, AIMessage
+from ...llm.scoring import aggregate_result, score_answer
+from ...llm.interviewer import ask_interviewer
+from ...llm.summary import compact_history
+from ...llm.speculation import use_speculative_question
+from ...llm.state import InterviewState
+from ...llm.turns import audio_turn_id, run_turn_once
+from ...llm.transcript import transcript_chats
+from ...services.interview_meta import get_interview_meta
 
 
 class MetaData(BaseModel):
     transcription: str
     interview_id: str
     audio_path: str
+    # the question being answered, captured before this turn moves it on
+    question: Optional[str] = None
 
 
 async def generate_next_question(metadata: MetaData):
-    audio_eval_key = f"answer:{metadata.interview_id}:{metadata.audio_path}"
+    audio_eval_key = answer_status_key(metadata.interview_id, metadata.audio_path)
     try:
-        meta_key = f"interview:{metadata.interview_id}:meta"
-        meta = redis_client.hgetall(meta_key)
+        meta = await get_interview_meta(metadata.interview_id)
         if not meta:
-            append_meta_log(
+            await append_meta_log(
                 audio_eval_key,
                 {
                     "status": "error",
@@ -51,7 +51,7 @@ async def generate_next_question(metadata: MetaData):
             )
             raise Exception("Interview not started or expired")
 
-        append_meta_log(
+        await append_meta_log(
             audio_eval_key,
             {
                 "status": "evaluation_started",
@@ -65,7 +65,7 @@ async def generate_next_question(metadata: MetaData):
         remaining_seconds = int((end_time - now).total_seconds())
 
         if remaining_seconds <= 0:
-            append_meta_log(
+            await append_meta_log(
                 audio_eval_key,
                 {
                     "status": "preparing_result",
@@ -74,48 +74,33 @@ async def generate_next_question(metadata: MetaData):
                 },
             )
 
-            await inngest_client.send(
-                Event(
-                    name="interview/interview.completed",
-                    data={"interview_id": metadata.interview_id},
-                )
-            )
-
             return None
 
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", system_prompt),
-                MessagesPlaceholder(variable_name="history"),
-                (
-                    "system",
-                    f"Remaining interview time (seconds): {remaining_seconds}. Follow timing rules strictly.",
-                ),
-                ("human", "{candidate_input}"),
-            ]
-        ).partial(format_instructions=question_parser.get_format_instructions())
-
-        chain = prompt | llm
-
-        chain_with_history = RunnableWithMessageHistory(
-            runnable=chain,
-            get_session_history=get_redis_memory,
-            input_messages_key="candidate_input",
-            history_messages_key="history",
-        )
+        speculative = False
 
-        raw_response = chain_with_history.invoke(
-            {
-                "candidate_input": metadata.transcription,
-                "job_title": meta["job_title"],
-                "job_description": meta["job_description"],
-                "candidate_name": meta["candidate_name"].split("@")[0],
-            },
-            config={"configurable": {"session_id": metadata.interview_id}},
-        )
+        async def next_question(state: InterviewState) -> dict:
+            nonlocal speculative
+            if settings.SPECULATIVE_QUESTIONS:
+                parsed = await use_speculative_question(
+                    metadata.interview_id, metadata.audio_path, metadata.transcription
+                )
+                if parsed is not None:
+                    speculative = True
+                    return parsed
+            return await ask_interviewer(
+                metadata.interview_id,
+                state,
+                metadata.transcription,
+                remaining_seconds,
+            )
 
-        parsed = parse_interview_json(
-            getattr(raw_response, "content", str(raw_response))
+        # a retried step gets the question generated the first time. The exchange
+        # is saved under the turn lock, before the client sees the next question
+        parsed = await run_turn_once(
+            metadata.interview_id,
+            audio_turn_id(metadata.audio_path),
+            next_question,
+            candidate_input=metadata.transcription,
         )
         payload = {
             "interviewer_res": {
@@ -126,7 +111,10 @@ async def generate_next_question(metadata: MetaData):
             "remainingSeconds": remaining_seconds,
         }
 
-        append_meta_log(
+        await record_question_latency(
+            metadata.interview_id, metadata.audio_path, speculative
+        )
+        await append_meta_log(
             audio_eval_key,
             {
                 "status": "evaluation_completed",
@@ -138,26 +126,24 @@ async def generate_next_question(metadata: MetaData):
         return parsed
 
     except Exception as e:
-        append_meta_log(
+        await append_meta_log(
             audio_eval_key,
             {"status": "error", "evaluation_payload": None, "error": str(e)},
         )
         raise
 
 
-def save_evaluation_log(data):
-    history = get_redis_memory(data["interview_id"])
-    history.add_message(HumanMessage(content=data["transcript"]))
-    history.add_message(
-        AIMessage(
-            content=data["question"],
-            additional_kwargs={
-                "type": data["type"],
-                "question_no": data["question_no"],
-            },
-        )
+async def score_transcribed_answer(metadata: MetaData):
+    question = metadata.question
+    if question is None:
+        meta = await get_interview_meta(metadata.interview_id, fresh=True)
+        question = meta.get("last_question")
+    return await score_answer(
+        metadata.interview_id,
+        question,
+        metadata.transcription,
+        audio_turn_id(metadata.audio_path),
     )
-    return True
 
 
 @inngest_client.create_function(
@@ -169,15 +155,32 @@ async def evaluate_user_answer(ctx: Context):
     try:
         metadata = MetaData(**ctx.event.data)
 
-        eval_result = await ctx.step.run(
-            "generate_next_question", lambda: generate_next_question(metadata)
+        # score the answer while the next question is generated
+        eval_result, _ = await ctx.group.parallel(
+            (
+                lambda: ctx.step.run(
+                    "generate_next_question", lambda: generate_next_question(metadata)
+                ),
+                lambda: ctx.step.run(
+                    "score-answer", lambda: score_transcribed_answer(metadata)
+                ),
+            )
         )
 
         if not eval_result:
+            # time is up, the last answer is already in the aggregate
+            await ctx.step.send_event(
+                "interview-completed",
+                Event(
+                    name="interview/interview.completed",
+                    data={"interview_id": metadata.interview_id},
+                ),
+            )
             return True
 
         eval_data = {
             "interview_id": metadata.interview_id,
+            "audio_path": metadata.audio_path,
             "transcript": metadata.transcription,
             "question": eval_result["question"],
             "type": eval_result["type"],
@@ -185,14 +188,16 @@ async def evaluate_user_answer(ctx: Context):
         }
 
         await ctx.step.run(
-            "store-evaluation-result", lambda: save_evaluation_log(eval_data)
+            "compact-history", lambda: compact_history(metadata.interview_id)
         )
 
         return eval_data
 
     except Exception as e:
-        audio_eval_key = f"answer:{ctx.event.data.get('interview_id')}:{ctx.event.data.get('audio_path')}"
-        append_meta_log(
+        audio_eval_key = answer_status_key(
+            ctx.event.data.get("interview_id"), ctx.event.data.get("audio_path")
+        )
+        await append_meta_log(
             audio_eval_key,
             {"status": "error", "evaluation_payload": None, "error": str(e)},
         )
@@ -207,13 +212,9 @@ async def evaluate_user_answer(ctx: Context):
 async def prepare_interview_result(ctx: Context):
     try:
         data = ctx.event.data
-        # history = parse_chat_history(get_redis_memory(data["interview_id"]))
-        history = parse_chat_history(
-            redis_client.lrange(f"message_store:{data['interview_id']}", 0, -1)
-        )
+        history = await transcript_chats(data["interview_id"])
 
-        evaluation_chain = result_evaluation_prompt | llm | result_parser
-        result = evaluation_chain.invoke({"chat_history": format_history(history)})
+        result = await aggregate_result(data["interview_id"])
 
         async with get_db_session_ctx() as session:
             interview_res = await session.execute(
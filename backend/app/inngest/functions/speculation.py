@@ -0,0 +1,28 @@
+from ..client import inngest_client
+from inngest import Context, TriggerEvent
+from ...config import settings
+from ...llm.speculation import speculate_next_question
+from ...router.upload_files import AudioUploadedData
+
+
+@inngest_client.create_function(
+    name="speculate next question",
+    fn_id="speculate-next-question",
+    trigger=TriggerEvent(event="interview/audio.uploaded"),
+    retries=0,
+)
+async def speculative_question_workflow(ctx: Context):
+    # runs next to the transcription workflow, a missing draft only means the
+    # evaluation falls back to a full interviewer turn
+    if not settings.SPECULATIVE_QUESTIONS:
+        return False
+
+    metadata = AudioUploadedData(**ctx.event.data)
+    try:
+        return await ctx.step.run(
+            "draft-next-question",
+            lambda: speculate_next_question(metadata.interview_id, metadata.audio_path),
+        )
+    except Exception as e:
+        print(f"[Speculation:{metadata.interview_id}] Draft failed: {str(e)}")
+        return False
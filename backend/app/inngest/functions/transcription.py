@@ -1,85 +1,97 @@
-from io import BytesIO
-import json
-import time
-import requests
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from ..client import inngest_client
 from inngest import Event, Context, TriggerEvent
-from ...db.supabase import supabase_client
+from ...db.redis import redis_client, AUDIO_METADATA_EXPIRY
 from ...config import settings
 from ...router.upload_files import AudioUploadedData
-from ...db.redis import redis_client, AUDIO_METADATA_EXPIRY
-
+from ...db.keys import answer_status_key
+from ...services.answer_status import append_meta_log
+from ...services.audio import prepare_recording
+from ...services.interview_meta import get_interview_meta
+from ...services.speech_to_text import get_stt_backend
+
+
+NO_SPEECH_PROMPT = "I couldn't hear your answer, please speak clearly and answer again."
+
+
+async def reject_silent_answer(interview_id: str, audio_path: str) -> bool:
+    """Asks the current question again without a transcription or LLM turn,
+    False when the interview is over and the normal flow should finish it."""
+    meta = await get_interview_meta(interview_id, fresh=True)
+    if not meta:
+        return False
+
+    end_time = datetime.fromisoformat(meta["end_time"])
+    remaining_seconds = int((end_time - datetime.now(timezone.utc)).total_seconds())
+    if remaining_seconds <= 0:
+        return False
+
+    question = f"{NO_SPEECH_PROMPT} {meta.get('last_question', '')}".strip()
+    await append_meta_log(
+        answer_status_key(interview_id, audio_path),
+        {
+            "status": "evaluation_completed",
+            "evaluation_payload": {
+                "interviewer_res": {
+                    "question": question,
+                    "type": "clarification",
+                    "question_no": int(meta.get("question_no", 1)),
+                },
+                "remainingSeconds": remaining_seconds,
+            },
+            "error": None,
+            "reason": "no_speech",
+        },
+    )
+    return True
 
-speechmatics_api_url = "https://eu1.asr.api.speechmatics.com/v2/jobs"
-headers = {"Authorization": f"Bearer {settings.SPEECHMATICS_API_KEY}"}
 
+async def submit_transcription(
+    audio_path: str, interview_id: str, source_path: Optional[str] = None
+) -> dict:
+    job = await get_stt_backend().submit(audio_path, interview_id, source_path)
+    return job.model_dump()
 
-def append_meta_log(meta_key: str, payload: dict):
-    entry = {
-        "ts": int(time.time()),
-        **payload,
-    }
-    redis_client.rpush(meta_key, json.dumps(entry))
-    redis_client.expire(meta_key, AUDIO_METADATA_EXPIRY)
 
+async def fetch_transcript(job_id: str) -> dict:
+    return {"transcript": await get_stt_backend().await_transcript(job_id)}
 
-def download_and_submit_to_speechmatics(audio_path: str):
-    # time.sleep(1)
-    # return {"job_id": "alpha"}
-    file_bytes = supabase_client.storage.from_("interviewly").download(audio_path)
-    files = {"data_file": (audio_path, BytesIO(file_bytes), "audio/webm")}
-    config = {"type": "transcription", "transcription_config": {"language": "en"}}
-    payload = {"config": json.dumps(config)}
 
-    response = requests.post(
-        speechmatics_api_url, headers=headers, files=files, data=payload, timeout=60
+async def complete_transcription(
+    job_id: str, interview_id: str, audio_path: str, transcript: str
+) -> bool:
+    # callback and timeout fallback can both finish a job, only the first one publishes
+    claimed = await redis_client.set(
+        f"transcript_job:{job_id}", 1, nx=True, ex=AUDIO_METADATA_EXPIRY
     )
-    response.raise_for_status()
-    job_id = response.json().get("id")
-
-    if not job_id:
-        raise ValueError("No job_id in Speechmatics response")
-
-    return {"job_id": job_id}
-
-
-def poll_speechmatics_transcript(job_id, timeout=180, interval=3):
-    # time.sleep(2)
-    # return {"transcript": "this is mine response"}
-    SPEECHMATICS_TRANSCRIPT_URL = (
-        "https://eu1.asr.api.speechmatics.com/v2/jobs/{job_id}/transcript?format=txt"
+    if not claimed:
+        return False
+
+    # the previous turn is saved before its question reaches the client, so this
+    # is the question the answer replies to
+    meta = await get_interview_meta(interview_id, fresh=True)
+    await append_meta_log(
+        answer_status_key(interview_id, audio_path),
+        {
+            "status": "transcription_completed",
+            "evaluation_payload": None,
+            "error": None,
+        },
     )
-    url = SPEECHMATICS_TRANSCRIPT_URL.format(job_id=job_id)
-    start = time.time()
-
-    while True:
-        res = requests.get(url, headers=headers)
-
-        if res.status_code == 200:
-            txt = res.text.strip()
-            if txt:
-                print(f"[Transcription] Transcript ready for job {job_id}")
-                return {"transcript": txt}
-            else:
-                return {
-                    "transcript": "Can't evaluate your answer , please speak clearly"
-                }
-
-        elif res.status_code in (202, 204, 404):
-            print(
-                f"[Transcription] Transcript not ready yet for job {job_id}, status {res.status_code}"
-            )
-        else:
-            raise RuntimeError(
-                f"Unexpected transcript status: {res.status_code} {res.text}"
-            )
-
-        if time.time() - start > timeout:
-            raise TimeoutError(
-                f"Speechmatics transcript polling timed out for job {job_id}"
-            )
-
-        time.sleep(interval)
+    await inngest_client.send(
+        Event(
+            name="interview/transcription.completed",
+            data={
+                "transcription": transcript,
+                "interview_id": interview_id,
+                "audio_path": audio_path,
+                "job_id": job_id,
+                "question": meta.get("last_question"),
+            },
+        )
+    )
+    return True
 
 
 @inngest_client.create_function(
@@ -90,17 +102,37 @@ def poll_speechmatics_transcript(job_id, timeout=180, interval=3):
 )
 async def transcription_workflow(ctx: Context):
     metadata: AudioUploadedData = AudioUploadedData(**ctx.event.data)
-    meta_key = f"answer:{metadata.interview_id}:{metadata.audio_path}"
+    meta_key = answer_status_key(metadata.interview_id, metadata.audio_path)
     try:
         print(
             f"[Transcription:{metadata.interview_id}] Starting workflow for interview"
         )
 
-        speechmatics_res = await ctx.step.run(
-            "submit-to-speechmatics",
-            lambda: download_and_submit_to_speechmatics(metadata.audio_path),
+        recording = await ctx.step.run(
+            "prepare-recording",
+            lambda: prepare_recording("interviewly", metadata.audio_path),
+        )
+        if not recording["has_speech"]:
+            rejected = await ctx.step.run(
+                "reject-silent-answer",
+                lambda: reject_silent_answer(
+                    metadata.interview_id, metadata.audio_path
+                ),
+            )
+            if rejected:
+                print(
+                    f"[Transcription:{metadata.interview_id}] No speech detected, skipped transcription"
+                )
+                return recording
+
+        job = await ctx.step.run(
+            "submit-transcription",
+            lambda: submit_transcription(
+                metadata.audio_path, metadata.interview_id, recording["audio_path"]
+            ),
         )
-        append_meta_log(
+        job_id = job["job_id"]
+        await append_meta_log(
             meta_key,
             {
                 "status": "transcription_started",
@@ -109,36 +141,54 @@ async def transcription_workflow(ctx: Context):
             },
         )
         print(
-            f"[Transcription:{metadata.interview_id}] Audio submitted to Speechmatics, job id: {speechmatics_res['job_id']}"
+            f"[Transcription:{metadata.interview_id}] Audio submitted for transcription, job id: {job_id}"
         )
 
+        # local backends finish inside submit, there is nothing to wait for
+        if job["transcript"] is not None:
+            published = await ctx.step.run(
+                "publish-transcript",
+                lambda: complete_transcription(
+                    job_id,
+                    metadata.interview_id,
+                    metadata.audio_path,
+                    job["transcript"],
+                ),
+            )
+            return {"job_id": job_id, "published": published}
+
+        # the backend's callback route (speechmatics) emits this event, nothing
+        # is held meanwhile
+        completed = await ctx.step.wait_for_event(
+            "wait-for-transcript",
+            event="interview/transcription.completed",
+            if_exp=f"async.data.job_id == '{job_id}'",
+            timeout=timedelta(seconds=settings.SPEECHMATICS_CALLBACK_TIMEOUT),
+        )
+        if completed:
+            print(f"[Transcription:{metadata.interview_id}] Transcription completed")
+            return completed.data
+
+        # callback never arrived (or raced ahead of the wait), fetch once instead
         transcription = await ctx.step.run(
-            "poll-transcript",
-            lambda: poll_speechmatics_transcript(speechmatics_res["job_id"]),
+            "fetch-transcript", lambda: fetch_transcript(job_id)
         )
-        append_meta_log(
-            meta_key,
-            {
-                "status": "transcription_completed",
-                "evaluation_payload": None,
-                "error": None,
-            },
+        published = await ctx.step.run(
+            "publish-transcript",
+            lambda: complete_transcription(
+                job_id,
+                metadata.interview_id,
+                metadata.audio_path,
+                transcription["transcript"],
+            ),
         )
-        print(f"[Transcription:{metadata.interview_id}] Transcription completed")
-
-        final_res = {
-            "transcription": transcription["transcript"],
-            "interview_id": metadata.interview_id,
-            "audio_path": metadata.audio_path,
-        }
-
-        job = await inngest_client.send(
-            Event(name="interview/transcription.completed", data=final_res)
+        print(
+            f"[Transcription:{metadata.interview_id}] Transcription completed via fallback fetch"
         )
 
-        return job
+        return {"job_id": job_id, "published": published}
     except Exception as e:
-        append_meta_log(
+        await append_meta_log(
             meta_key, {"status": "error", "evaluation_payload": None, "error": str(e)}
         )
         print(f"[Inngest] Transcription workflow failed error: {str(e)}")
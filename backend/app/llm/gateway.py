@@ -0,0 +1,251 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Optional, Type
+from langchain_core.messages.ai import add_usage
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+from .config import MODEL_ROUTES, model_for
+from ..config import settings
+from ..db.redis import redis_client, sync_redis_client
+from ..services.metrics import record_sample_soon, record_sample_sync
+
+# every gemini call goes through here: a per-purpose concurrency limit in this
+# worker plus a token bucket in redis shared by all workers. Background work
+# (scoring, summaries, results) gets fewer slots and must leave
+# LLM_INTERACTIVE_RESERVE tokens in the bucket, so turns a candidate is waiting
+# on are served first when the provider quota runs short.
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+BUCKET_KEY = "llm:bucket"
+QUEUE_TIME_KEY = "metrics:llm_queue_ms"
+CALLS_KEY = "metrics:llm_calls"
+INTERACTIVE_ROUTES = ("interviewer", "interviewer_fast", "refine")
+
+# returns seconds to wait before a token is available, 0 when one was taken
+TAKE_TOKEN_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 + reserve then
+    tokens = tokens - 1
+else
+    wait = (1 + reserve - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+take_token_script = redis_client.register_script(TAKE_TOKEN_SCRIPT)
+take_token_script_sync = sync_redis_client.register_script(TAKE_TOKEN_SCRIPT)
+
+
+class LLMOverloaded(Exception):
+    pass
+
+
+class Lane:
+    def __init__(self, concurrency: int, max_queue_seconds: float, reserve: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        # sync calls block a thread, not the event loop, so they get their own slots
+        self.thread_semaphore = threading.BoundedSemaphore(concurrency)
+        self.max_queue_seconds = max_queue_seconds
+        self.reserve = reserve
+        self.waiting = 0
+
+    @property
+    def saturated(self) -> bool:
+        return self.waiting >= settings.LLM_MAX_WAITING
+
+
+lanes = {
+    INTERACTIVE: Lane(
+        settings.LLM_INTERACTIVE_CONCURRENCY,
+        settings.LLM_INTERACTIVE_MAX_QUEUE_SECONDS,
+        reserve=0,
+    ),
+    BACKGROUND: Lane(
+        settings.LLM_BACKGROUND_CONCURRENCY,
+        settings.LLM_BACKGROUND_MAX_QUEUE_SECONDS,
+        reserve=settings.LLM_INTERACTIVE_RESERVE,
+    ),
+}
+
+
+def ensure_capacity(purpose: str = INTERACTIVE):
+    """Cheap admission check for routes, before any work is started."""
+    if lanes[purpose].saturated:
+        raise LLMOverloaded(f"Too many {purpose} LLM requests queued")
+
+
+def bucket_args(lane: Lane) -> list:
+    capacity = settings.LLM_REQUESTS_PER_MINUTE
+    return [capacity, capacity / 60, lane.reserve]
+
+
+def token_acquired(wait: float, deadline: float) -> bool:
+    if wait <= 0:
+        return True
+    if time.monotonic() + wait > deadline:
+        raise LLMOverloaded("LLM rate limit reached")
+    return False
+
+
+async def take_token(lane: Lane, deadline: float):
+    while True:
+        try:
+            wait = float(
+                await take_token_script(keys=[BUCKET_KEY], args=bucket_args(lane))
+            )
+        except Exception as e:
+            # rate limiting must not take the interview down with redis
+            print("LLM rate limiter unavailable:", e)
+            return
+
+        if token_acquired(wait, deadline):
+            return
+        await asyncio.sleep(wait)
+
+
+def take_token_sync(lane: Lane, deadline: float):
+    while True:
+        try:
+            wait = float(
+                take_token_script_sync(keys=[BUCKET_KEY], args=bucket_args(lane))
+            )
+        except Exception as e:
+            print("LLM rate limiter unavailable:", e)
+            return
+
+        if token_acquired(wait, deadline):
+            return
+        time.sleep(wait)
+
+
+@asynccontextmanager
+async def llm_slot(purpose: str):
+    lane = lanes[purpose]
+    ensure_capacity(purpose)
+
+    queued_at = time.monotonic()
+    deadline = queued_at + lane.max_queue_seconds
+    lane.waiting += 1
+    try:
+        await asyncio.wait_for(lane.semaphore.acquire(), lane.max_queue_seconds)
+    except asyncio.TimeoutError:
+        raise LLMOverloaded(f"Timed out waiting for a {purpose} LLM slot")
+    finally:
+        lane.waiting -= 1
+
+    try:
+        await take_token(lane, deadline)
+        queue_ms = int((time.monotonic() - queued_at) * 1000)
+        record_sample_soon(QUEUE_TIME_KEY, {"ms": queue_ms, "purpose": purpose})
+        yield
+    finally:
+        lane.semaphore.release()
+
+
+@contextmanager
+def llm_slot_sync(purpose: str):
+    """llm_slot for sync callers, blocks the calling thread while queued."""
+    lane = lanes[purpose]
+    ensure_capacity(purpose)
+
+    queued_at = time.monotonic()
+    deadline = queued_at + lane.max_queue_seconds
+    if not lane.thread_semaphore.acquire(timeout=lane.max_queue_seconds):
+        raise LLMOverloaded(f"Timed out waiting for a {purpose} LLM slot")
+
+    try:
+        take_token_sync(lane, deadline)
+        queue_ms = int((time.monotonic() - queued_at) * 1000)
+        try:
+            record_sample_sync(QUEUE_TIME_KEY, {"ms": queue_ms, "purpose": purpose})
+        except Exception as e:
+            print("Failed to record LLM queue time:", e)
+        yield
+    finally:
+        lane.thread_semaphore.release()
+
+
+class GatedModel(Runnable):
+    """Chat model wrapper that holds an llm_slot for the whole call, including
+    while a response is streamed, and records latency and token usage for its
+    route. The sync api goes through the same limits on thread semaphores.
+
+    With a `schema` the provider constrains decoding to that JSON schema (what
+    with_structured_output binds), the raw message is returned so callers can
+    still stream it and parse it themselves."""
+
+    def __init__(self, route: str, schema: Optional[Type[BaseModel]] = None):
+        self.route = route
+        self.model = model_for(route)
+        if schema is not None:
+            self.model = self.model.bind(
+                response_mime_type="application/json",
+                response_schema=schema.model_json_schema(),
+            )
+        self.purpose = INTERACTIVE if route in INTERACTIVE_ROUTES else BACKGROUND
+
+    def invoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs
+    ) -> Any:
+        with llm_slot_sync(self.purpose):
+            started = time.monotonic()
+            response = self.model.invoke(input, config, **kwargs)
+        try:
+            record_sample_sync(
+                CALLS_KEY,
+                self.call_sample(started, getattr(response, "usage_metadata", None)),
+            )
+        except Exception as e:
+            print("Failed to record LLM call:", e)
+        return response
+
+    async def ainvoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs
+    ) -> Any:
+        async with llm_slot(self.purpose):
+            started = time.monotonic()
+            response = await self.model.ainvoke(input, config, **kwargs)
+        record_sample_soon(
+            CALLS_KEY,
+            self.call_sample(started, getattr(response, "usage_metadata", None)),
+        )
+        return response
+
+    async def astream(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs
+    ) -> AsyncIterator[Any]:
+        usage = None
+        async with llm_slot(self.purpose):
+            started = time.monotonic()
+            async for chunk in self.model.astream(input, config, **kwargs):
+                if getattr(chunk, "usage_metadata", None):
+                    usage = add_usage(usage, chunk.usage_metadata)
+                yield chunk
+        record_sample_soon(CALLS_KEY, self.call_sample(started, usage))
+
+    def call_sample(self, started: float, usage: Optional[dict]) -> dict:
+        return {
+            "route": self.route,
+            "model": MODEL_ROUTES[self.route],
+            "ms": int((time.monotonic() - started) * 1000),
+            "input_tokens": (usage or {}).get("input_tokens"),
+            "output_tokens": (usage or {}).get("output_tokens"),
+        }
+
+
+@lru_cache(maxsize=None)
+def routed_llm(route: str, schema: Optional[Type[BaseModel]] = None) -> GatedModel:
+    return GatedModel(route, schema)
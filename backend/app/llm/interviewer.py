@@ -0,0 +1,168 @@
+from typing import AsyncIterator, Dict, Optional
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.utils.json import parse_json_markdown
+from langchain_core.exceptions import OutputParserException
+from .config import InterviewQuestion, fallback_question, interviewer_route
+from .gateway import routed_llm
+from .prompt_cache import cached_interview_prompt, get_interview_prompt
+from .structured import parse_structured
+from .state import InterviewState, load_interview_state
+from .transcript import get_transcript_history
+from ..services.interview_meta import set_interview_meta
+
+# static, per-interview system prompt first (cached, identical every turn), the
+# only per-turn parts are the history and the short tail below
+interviewer_prompt = ChatPromptTemplate.from_messages(
+    [
+        MessagesPlaceholder(variable_name="system_prompt"),
+        MessagesPlaceholder(variable_name="history"),
+        (
+            "system",
+            "Current question number: {current_question_no}. Remaining interview time (seconds): {remaining_seconds}. Follow timing rules strictly.",
+        ),
+        ("human", "{candidate_input}"),
+    ]
+)
+
+# history is only read (with the rest of the turn state), save_interviewer_turn
+# writes each exchange once
+interviewer_chains = {
+    route: interviewer_prompt | routed_llm(route, InterviewQuestion)
+    for route in ("interviewer", "interviewer_fast")
+}
+
+
+async def load_turn_state(interview_id: str) -> InterviewState:
+    # the prompt is only fetched along with the rest when it isn't cached locally
+    return await load_interview_state(
+        interview_id, include_prompt=cached_interview_prompt(interview_id) is None
+    )
+
+
+async def interviewer_input(
+    interview_id: str,
+    state: InterviewState,
+    candidate_input: str,
+    remaining_seconds: int,
+) -> dict:
+    system_prompt = await get_interview_prompt(
+        interview_id, state.meta, state.system_prompt
+    )
+    return {
+        "system_prompt": [SystemMessage(content=system_prompt)],
+        "history": state.history(),
+        "candidate_input": candidate_input,
+        "current_question_no": state.meta.get("question_no", 1),
+        "remaining_seconds": remaining_seconds,
+    }
+
+
+async def parse_question(route: str, meta: dict, text: str) -> Dict[str, object]:
+    try:
+        question = await parse_structured(InterviewQuestion, text, route)
+    except OutputParserException:
+        return fallback_question(meta)
+    return question.model_dump()
+
+
+def banked_opening_question(meta: dict) -> Optional[Dict[str, object]]:
+    """Pre-generated first question picked at interview start, only for the first turn."""
+    if "question_no" in meta or not meta.get("opening_question"):
+        return None
+    return {"type": "theory", "question": meta["opening_question"], "question_no": 1}
+
+
+async def ask_interviewer(
+    interview_id: str,
+    state: InterviewState,
+    candidate_input: str,
+    remaining_seconds: int,
+) -> Dict[str, object]:
+    meta = state.meta
+    opening = banked_opening_question(meta)
+    if opening:
+        return opening
+
+    route = interviewer_route(meta)
+    raw_response = await interviewer_chains[route].ainvoke(
+        await interviewer_input(interview_id, state, candidate_input, remaining_seconds)
+    )
+    return await parse_question(route, meta, raw_response.text)
+
+
+async def draft_interviewer_question(
+    interview_id: str, meta: dict, candidate_input: str, remaining_seconds: int
+) -> Dict[str, object]:
+    """Same prompt and history as a real turn on the speculation route, used for
+    speculative questions that may be thrown away."""
+    llm = routed_llm("speculation", InterviewQuestion)
+    state = await load_turn_state(interview_id)
+    raw_response = await (interviewer_prompt | llm).ainvoke(
+        await interviewer_input(interview_id, state, candidate_input, remaining_seconds)
+    )
+    return await parse_question("speculation", meta, raw_response.text)
+
+
+async def stream_interviewer(
+    interview_id: str,
+    state: InterviewState,
+    candidate_input: str,
+    remaining_seconds: int,
+) -> AsyncIterator[tuple[str, object]]:
+    """Yields ("token", text) for every new piece of the `question` field as the
+    model generates it, then ("done", parsed_question) once the turn is complete."""
+    meta = state.meta
+    opening = banked_opening_question(meta)
+    if opening:
+        yield "token", opening["question"]
+        yield "done", opening
+        return
+
+    route = interviewer_route(meta)
+    content = ""
+    streamed = ""
+
+    async for chunk in interviewer_chains[route].astream(
+        await interviewer_input(interview_id, state, candidate_input, remaining_seconds)
+    ):
+        content += chunk.text
+        try:
+            partial = parse_json_markdown(content)
+        except Exception:
+            continue
+
+        question = partial.get("question") if isinstance(partial, dict) else None
+        if (
+            isinstance(question, str)
+            and question.startswith(streamed)
+            and len(question) > len(streamed)
+        ):
+            yield "token", question[len(streamed) :]
+            streamed = question
+
+    yield "done", await parse_question(route, meta, content)
+
+
+async def save_interviewer_turn(interview_id: str, candidate_input: str, parsed: dict):
+    history = get_transcript_history(interview_id)
+    await history.aadd_messages(
+        [
+            HumanMessage(content=candidate_input),
+            AIMessage(
+                content=parsed["question"],
+                additional_kwargs={
+                    "type": parsed["type"],
+                    "question_no": parsed["question_no"],
+                },
+            ),
+        ]
+    )
+    await set_interview_meta(
+        interview_id,
+        {
+            "question_no": parsed["question_no"],
+            "last_question": parsed["question"],
+            "last_type": parsed["type"],
+        },
+    )
@@ -0,0 +1,49 @@
+from typing import Optional
+from .config import system_prompt
+from ..config import settings
+from ..db.keys import prompt_key
+from ..db.redis import redis_client, INTERVIEW_METADATA_EXPIRY
+from ..services.cache import TTLCache
+
+# the system prompt only depends on data fixed at interview start, so it is rendered
+# once and every turn sends the exact same prefix
+_prompt_cache = TTLCache(
+    maxsize=settings.PROMPT_CACHE_SIZE, ttl=INTERVIEW_METADATA_EXPIRY
+)
+
+
+def render_system_prompt(meta: dict) -> str:
+    return system_prompt.format(
+        job_title=meta["job_title"],
+        job_description=meta["job_description"],
+        candidate_name=meta["candidate_name"].split("@")[0],
+    )
+
+
+async def cache_interview_prompt(interview_id: str, meta: dict) -> str:
+    prompt = render_system_prompt(meta)
+    _prompt_cache.set(interview_id, prompt)
+    await redis_client.set(
+        prompt_key(interview_id), prompt, ex=INTERVIEW_METADATA_EXPIRY
+    )
+    return prompt
+
+
+def cached_interview_prompt(interview_id: str) -> Optional[str]:
+    return _prompt_cache.get(interview_id)
+
+
+async def get_interview_prompt(
+    interview_id: str, meta: dict, stored: Optional[str] = None
+) -> str:
+    """`stored` is the prompt already read from redis with other state, if any."""
+    prompt = _prompt_cache.get(interview_id)
+    if prompt is not None:
+        return prompt
+
+    prompt = stored or await redis_client.get(prompt_key(interview_id))
+    if prompt is not None:
+        _prompt_cache.set(interview_id, prompt)
+        return prompt
+
+    return await cache_interview_prompt(interview_id, meta)
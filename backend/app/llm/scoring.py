@@ -0,0 +1,115 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from langchain_core.prompts import PromptTemplate
+from .config import InterviewEvaluation
+from .structured import structured_llm
+from ..db.keys import aggregate_keys, turn_key
+from ..db.redis import redis_client, INTERVIEW_METADATA_EXPIRY
+from ..db.redis_scripts import add_score
+
+# every answer is scored right after transcription and summed into redis, so the
+# final result is an average over the aggregate plus one short suggestions pass
+NO_ANSWER_SUGGESTION = (
+    "Answer the interviewer's questions so your skills can be evaluated"
+)
+
+
+class AnswerScore(BaseModel):
+    communication: float = Field(..., ge=0, le=10)
+    technical_knowledge: float = Field(..., ge=0, le=10)
+    clarity: float = Field(..., ge=0, le=10)
+    suggestion: str = Field(description="One actionable interview-skill suggestion")
+
+
+class ResultSuggestions(BaseModel):
+    suggestions: List[str] = Field(..., min_length=1)
+
+
+answer_score_prompt = PromptTemplate(
+    template="""You are an expert technical interviewer scoring ONE answer of a candidate.
+Score the CANDIDATE'S PERFORMANCE on this answer (0-10 each):
+- communication: can they explain their thinking clearly?
+- technical_knowledge: correctness and depth of the concepts used
+- clarity: structure, stated assumptions, justification of decisions
+Empty, off-topic or non-answers score 0-3. The suggestion must be about interview
+skills (e.g. "State your assumptions before answering"), not a code review.
+
+## QUESTION
+{question}
+
+## CANDIDATE ANSWER
+{answer}
+""",
+    input_variables=["question", "answer"],
+)
+answer_score_chain = answer_score_prompt | structured_llm("scoring", AnswerScore)
+
+suggestions_prompt = PromptTemplate(
+    template="""Below are feedback notes collected after each answer of a technical interview.
+Merge them into 3-5 distinct, actionable suggestions about the candidate's interview skills.
+
+{notes}
+""",
+    input_variables=["notes"],
+)
+suggestions_chain = suggestions_prompt | structured_llm("result", ResultSuggestions)
+
+
+async def score_answer(
+    interview_id: str, question: Optional[str], answer: str, turn_id: str
+) -> Optional[dict]:
+    """Scores one answer into the interview aggregate once per turn, never raises
+    (the turn itself must not fail because scoring did)."""
+    if not question:
+        return None
+
+    scored_key = f"{turn_key(interview_id, turn_id)}:scored"
+    if not await redis_client.set(scored_key, 1, nx=True, ex=INTERVIEW_METADATA_EXPIRY):
+        return None
+
+    try:
+        score = await answer_score_chain.ainvoke(
+            {"question": question, "answer": answer}
+        )
+
+        await add_score(
+            *aggregate_keys(interview_id),
+            score.communication,
+            score.technical_knowledge,
+            score.clarity,
+            score.suggestion,
+            INTERVIEW_METADATA_EXPIRY,
+        )
+        return score.model_dump()
+    except Exception as e:
+        print("Failed to score answer:", e)
+        await redis_client.delete(scored_key)
+        return None
+
+
+async def aggregate_result(interview_id: str) -> InterviewEvaluation:
+    agg_key, sug_key = aggregate_keys(interview_id)
+    pipe = redis_client.pipeline()
+    pipe.hgetall(agg_key)
+    pipe.lrange(sug_key, 0, -1)
+    aggregate, notes = await pipe.execute()
+
+    count = int(aggregate.get("count", 0))
+    if not count:
+        return InterviewEvaluation(
+            communication_score=0,
+            technical_score=0,
+            clarity_score=0,
+            suggestions=[NO_ANSWER_SUGGESTION],
+        )
+
+    suggestions = await suggestions_chain.ainvoke(
+        {"notes": "\n".join(f"- {note}" for note in notes)}
+    )
+
+    return InterviewEvaluation(
+        communication_score=round(float(aggregate["total_comm"]) / count, 1),
+        technical_score=round(float(aggregate["total_tech"]) / count, 1),
+        clarity_score=round(float(aggregate["total_clarity"]) / count, 1),
+        suggestions=suggestions.suggestions,
+    )
@@ -0,0 +1,92 @@
+import json
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from langchain_core.prompts import PromptTemplate
+from .config import InterviewQuestion
+from .interviewer import banked_opening_question, draft_interviewer_question
+from .structured import structured_llm
+from ..db.keys import answer_key
+from ..db.redis import redis_client
+from ..services.interview_meta import get_interview_meta
+
+# while an answer is being transcribed the next question is drafted from the
+# history alone, once the transcript lands it only needs a short refinement
+SPECULATION_EXPIRY = 10 * 60  # 10 mins
+SPECULATIVE_INPUT = (
+    "(The candidate's answer to the current question is still being transcribed.) "
+    "Move on and ask the next question on a new topic that does not depend on "
+    "the content of that answer."
+)
+
+refine_prompt = PromptTemplate(
+    template="""You are a technical interviewer. You planned the next question before
+hearing the candidate's latest answer. Read the answer and return the planned
+question unchanged if it still fits. Rewrite it only if the answer already covers
+it, or the answer was empty or off-topic and needs a clarification. Keep the same
+question_no.
+
+## PLANNED QUESTION
+{planned}
+
+## QUESTION THE CANDIDATE ANSWERED
+{previous_question}
+
+## CANDIDATE ANSWER
+{answer}
+""",
+    input_variables=["planned", "previous_question", "answer"],
+)
+refine_chain = refine_prompt | structured_llm("refine", InterviewQuestion)
+
+
+def speculation_key(interview_id: str, audio_path: str) -> str:
+    return answer_key(interview_id, audio_path, "speculative")
+
+
+async def speculate_next_question(interview_id: str, audio_path: str) -> bool:
+    meta = await get_interview_meta(interview_id, fresh=True)
+    if not meta or banked_opening_question(meta):
+        return False
+
+    end_time = datetime.fromisoformat(meta["end_time"])
+    remaining_seconds = int((end_time - datetime.now(timezone.utc)).total_seconds())
+    if remaining_seconds <= 0:
+        return False
+
+    draft = await draft_interviewer_question(
+        interview_id, meta, SPECULATIVE_INPUT, remaining_seconds
+    )
+    await redis_client.set(
+        speculation_key(interview_id, audio_path),
+        json.dumps({**draft, "previous_question": meta.get("last_question", "")}),
+        ex=SPECULATION_EXPIRY,
+    )
+    return True
+
+
+async def use_speculative_question(
+    interview_id: str, audio_path: str, answer: str
+) -> Optional[Dict[str, object]]:
+    """Refined speculative question, or None when no draft is ready yet."""
+    raw = await redis_client.getdel(speculation_key(interview_id, audio_path))
+    if not raw:
+        return None
+
+    draft = json.loads(raw)
+    planned = {
+        "type": draft["type"],
+        "question": draft["question"],
+        "question_no": draft["question_no"],
+    }
+    try:
+        refined = await refine_chain.ainvoke(
+            {
+                "planned": json.dumps(planned),
+                "previous_question": draft["previous_question"],
+                "answer": answer,
+            }
+        )
+        return refined.model_dump()
+    except Exception as e:
+        print("Speculative question refinement failed:", e)
+        return planned
@@ -0,0 +1,73 @@
+from typing import List, Optional
+from pydantic import BaseModel
+from langchain_core.messages import BaseMessage, SystemMessage
+from .summary import render_summary
+from .transcript import TranscriptEntry
+from ..db.keys import meta_key, prompt_key, summary_key, transcript_key
+from ..db.redis import redis_client
+
+# everything a turn reads, in one round trip. The keys share the interview's
+# hash tag so the script stays cluster safe. The transcript cursor lives in the
+# summary hash, which is why this is a script and not a MULTI.
+
+# KEYS: meta, prompt, summary, transcript | ARGV: "1" to include the prompt
+LOAD_STATE_SCRIPT = """
+local meta = redis.call('HGETALL', KEYS[1])
+local prompt = false
+if ARGV[1] == '1' then
+    prompt = redis.call('GET', KEYS[2])
+end
+local summary = redis.call('HMGET', KEYS[3], 'summary', 'summarized_until')
+local start = '-'
+if summary[2] then
+    start = '(' .. summary[2]
+end
+local pending = redis.call('XRANGE', KEYS[4], start, '+')
+return {meta, prompt, summary[1], summary[2], pending}
+"""
+load_state_script = redis_client.register_script(LOAD_STATE_SCRIPT)
+
+
+def pairs_to_dict(flat: list) -> dict:
+    return dict(zip(flat[::2], flat[1::2]))
+
+
+class InterviewState(BaseModel):
+    meta: dict
+    # None when not requested or not rendered yet
+    system_prompt: Optional[str] = None
+    summary: Optional[str] = None
+    summarized_until: Optional[str] = None
+    # transcript entries not folded into the summary yet
+    pending: List[TranscriptEntry] = []
+
+    def history(self) -> list[BaseMessage]:
+        """Summary of folded turns followed by only the turns not yet summarized."""
+        messages = [entry.to_message() for entry in self.pending]
+        if self.summary:
+            return [SystemMessage(content=render_summary(self.summary)), *messages]
+        return messages
+
+
+async def load_interview_state(
+    interview_id: str, include_prompt: bool = True
+) -> InterviewState:
+    meta, prompt, summary, summarized_until, pending = await load_state_script(
+        keys=[
+            meta_key(interview_id),
+            prompt_key(interview_id),
+            summary_key(interview_id),
+            transcript_key(interview_id),
+        ],
+        args=["1" if include_prompt else "0"],
+    )
+    return InterviewState(
+        meta=pairs_to_dict(meta),
+        system_prompt=prompt,
+        summary=summary,
+        summarized_until=summarized_until,
+        pending=[
+            TranscriptEntry.from_fields(entry_id, pairs_to_dict(fields))
+            for entry_id, fields in pending
+        ],
+    )
@@ -0,0 +1,72 @@
+from typing import Type, TypeVar
+from pydantic import BaseModel
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
+from .gateway import routed_llm
+from ..config import settings
+from ..db.redis import redis_client
+
+# chains ask gemini for schema-constrained json, so output that still fails to
+# parse (truncated, refused, schema drift) is rare: it gets LLM_REPAIR_ATTEMPTS
+# corrections on the same route before the caller falls back or fails, and every
+# outcome is counted per route in PARSE_FAILURES_KEY
+PARSE_FAILURES_KEY = "metrics:llm_parse_failures"
+
+Model = TypeVar("Model", bound=BaseModel)
+
+repair_prompt = PromptTemplate(
+    template="""The text below was meant to be a single JSON object matching the response schema, but it could not be parsed.
+Return the corrected JSON object with the same content.
+
+## ERROR
+{error}
+
+## TEXT
+{output}
+""",
+    input_variables=["error", "output"],
+)
+
+
+async def count_parse_outcome(route: str, outcome: str):
+    try:
+        await redis_client.hincrby(PARSE_FAILURES_KEY, f"{route}:{outcome}", 1)
+    except Exception as e:
+        print("Failed to count parse outcome:", e)
+
+
+async def parse_structured(schema: Type[Model], text: str, route: str) -> Model:
+    """Parses `text` into `schema`, asking the route's model to repair invalid
+    output. Raises OutputParserException once the repairs are used up."""
+    parser = PydanticOutputParser(pydantic_object=schema)
+    try:
+        return parser.parse(text)
+    except OutputParserException as e:
+        error = e
+
+    await count_parse_outcome(route, "failed")
+    repair_chain = repair_prompt | routed_llm(route, schema)
+    for attempt in range(settings.LLM_REPAIR_ATTEMPTS):
+        print(f"[LLM:{route}] Repairing unparsable output, attempt {attempt + 1}")
+        try:
+            repaired = await repair_chain.ainvoke({"error": str(error), "output": text})
+            result = parser.parse(repaired.text)
+        except OutputParserException as e:
+            error = e
+            continue
+        await count_parse_outcome(route, "repaired")
+        return result
+
+    await count_parse_outcome(route, "unrepaired")
+    raise error
+
+
+def structured_llm(route: str, schema: Type[Model]) -> Runnable:
+    """Routed model constrained to `schema`, returning the parsed object."""
+
+    async def parse(message) -> Model:
+        return await parse_structured(schema, message.text, route)
+
+    return routed_llm(route, schema) | RunnableLambda(parse)
@@ -0,0 +1,107 @@
+import uuid
+from typing import List
+from pydantic import BaseModel, Field
+from langchain_core.prompts import PromptTemplate
+from .structured import structured_llm
+from .transcript import TranscriptEntry, read_after
+from ..config import settings
+from ..db.keys import summary_key, summary_lock_key
+from ..db.redis import redis_client, INTERVIEW_METADATA_EXPIRY
+from ..db.redis_scripts import release_lock
+
+# history older than the verbatim tail is folded into one running summary, so
+# prompt size stays flat no matter how many questions were asked
+
+
+class ConversationSummary(BaseModel):
+    covered_topics: List[str] = Field(description="Topics already asked about")
+    strengths: List[str] = Field(description="Where the candidate did well")
+    gaps: List[str] = Field(description="Weak spots or knowledge gaps to probe")
+    current_question_no: int = Field(description="Number of the last question asked")
+
+
+summary_prompt = PromptTemplate(
+    template="""You maintain a running summary of a technical interview.
+Merge the new conversation turns into the previous summary. Keep every list short
+(max 8 items, a few words each), drop duplicates and keep the highest question number seen.
+
+## PREVIOUS SUMMARY
+{previous_summary}
+
+## NEW TURNS
+{conversation}
+""",
+    input_variables=["previous_summary", "conversation"],
+)
+summary_chain = summary_prompt | structured_llm("summary", ConversationSummary)
+
+
+def approx_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def render_summary(raw: str) -> str:
+    summary = ConversationSummary.model_validate_json(raw)
+    return (
+        "## INTERVIEW SO FAR (summary of earlier turns)\n"
+        f"- Covered topics: {', '.join(summary.covered_topics) or 'none'}\n"
+        f"- Strengths: {', '.join(summary.strengths) or 'none'}\n"
+        f"- Gaps: {', '.join(summary.gaps) or 'none'}\n"
+        f"- Last question number: {summary.current_question_no}"
+    )
+
+
+def format_turns(entries: List[TranscriptEntry]) -> str:
+    return "\n".join(
+        f"{'Candidate' if e.role == 'human' else 'Interviewer'}: {e.text}"
+        for e in entries
+    )
+
+
+def verbatim_tail_size(entries: List[TranscriptEntry]) -> int:
+    """How many of the newest messages stay verbatim: at most the last N exchanges
+    and within the token budget, but always the latest exchange."""
+    keep, tokens = 0, 0
+    for entry in reversed(entries[-settings.HISTORY_KEEP_EXCHANGES * 2 :]):
+        tokens += approx_tokens(entry.text)
+        if keep >= 2 and tokens > settings.HISTORY_TOKEN_BUDGET:
+            break
+        keep += 1
+    return keep
+
+
+async def compact_history(session_id: str):
+    lock_key = summary_lock_key(session_id)
+    token = uuid.uuid4().hex
+    if not await redis_client.set(lock_key, token, nx=True, ex=60):
+        return
+
+    try:
+        data = await redis_client.hgetall(summary_key(session_id))
+        pending = await read_after(session_id, data.get("summarized_until"))
+        if len(pending) <= settings.HISTORY_KEEP_EXCHANGES * 2:
+            return
+
+        fold = pending[: len(pending) - verbatim_tail_size(pending)]
+        if not fold:
+            return
+
+        summary = await summary_chain.ainvoke(
+            {
+                "previous_summary": data.get("summary") or "None yet",
+                "conversation": format_turns(fold),
+            }
+        )
+
+        await redis_client.hset(
+            summary_key(session_id),
+            mapping={
+                "summary": summary.model_dump_json(),
+                "summarized_until": fold[-1].id,
+            },
+        )
+        await redis_client.expire(summary_key(session_id), INTERVIEW_METADATA_EXPIRY)
+    except Exception as e:
+        print("History compaction failed:", e)
+    finally:
+        await release_lock(lock_key, token)
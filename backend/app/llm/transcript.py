@@ -0,0 +1,179 @@
+from datetime import datetime, timezone
+from typing import List, Literal, Optional, Sequence
+from pydantic import BaseModel
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from ..config import settings
+from ..db.keys import transcript_key
+from ..db.redis import redis_client, sync_redis_client
+
+# one redis stream entry per message with short flat fields, oldest first. The
+# entry id doubles as the timestamp and as the cursor, so the newest N messages
+# or everything after a cursor are read without touching the rest of the log.
+FIRST = "-"
+
+
+class TranscriptEntry(BaseModel):
+    id: str = ""
+    role: Literal["human", "ai"]
+    text: str
+    # only set on interviewer questions
+    type: Optional[str] = None
+    question_no: Optional[int] = None
+
+    @property
+    def at(self) -> datetime:
+        ms = int(self.id.split("-")[0])
+        return datetime.fromtimestamp(ms / 1000, timezone.utc)
+
+    @classmethod
+    def from_fields(cls, entry_id: str, fields: dict) -> "TranscriptEntry":
+        return cls(
+            id=entry_id,
+            role=fields["r"],
+            text=fields["t"],
+            type=fields.get("ty"),
+            question_no=fields.get("q"),
+        )
+
+    def to_fields(self) -> dict:
+        fields = {"r": self.role, "t": self.text}
+        if self.type is not None:
+            fields["ty"] = self.type
+        if self.question_no is not None:
+            fields["q"] = self.question_no
+        return fields
+
+    @classmethod
+    def from_message(cls, message: BaseMessage) -> "TranscriptEntry":
+        role = "human" if message.type == "human" else "ai"
+        return cls(
+            role=role,
+            text=message.text,
+            type=message.additional_kwargs.get("type"),
+            question_no=message.additional_kwargs.get("question_no"),
+        )
+
+    def to_message(self) -> BaseMessage:
+        if self.role == "human":
+            return HumanMessage(content=self.text)
+        kwargs = {"type": self.type, "question_no": self.question_no}
+        return AIMessage(
+            content=self.text,
+            additional_kwargs={k: v for k, v in kwargs.items() if v is not None},
+        )
+
+
+def append_pipeline(
+    client,
+    interview_id: str,
+    entries: Sequence[TranscriptEntry],
+    ttl: Optional[int],
+    max_entries: Optional[int],
+):
+    key = transcript_key(interview_id)
+    pipe = client.pipeline()
+    for entry in entries:
+        pipe.xadd(key, entry.to_fields(), maxlen=max_entries or None, approximate=True)
+    if ttl:
+        pipe.expire(key, ttl)
+    return pipe
+
+
+async def append_entries(
+    interview_id: str,
+    entries: Sequence[TranscriptEntry],
+    ttl: Optional[int] = None,
+    max_entries: Optional[int] = None,
+):
+    """Appends in one round trip, optionally refreshing the key expiry and
+    trimming the oldest entries (approximately) beyond `max_entries`."""
+    if not entries:
+        return
+    await append_pipeline(
+        redis_client, interview_id, entries, ttl, max_entries
+    ).execute()
+
+
+async def read_after(
+    interview_id: str, cursor: Optional[str] = None, count: Optional[int] = None
+) -> List[TranscriptEntry]:
+    """Entries after `cursor` (an entry id, exclusive), all of them without one."""
+    start = f"({cursor}" if cursor else FIRST
+    items = await redis_client.xrange(transcript_key(interview_id), start, count=count)
+    return [TranscriptEntry.from_fields(entry_id, f) for entry_id, f in items]
+
+
+async def read_tail(interview_id: str, count: int) -> List[TranscriptEntry]:
+    """Newest `count` entries, oldest first."""
+    items = await redis_client.xrevrange(transcript_key(interview_id), count=count)
+    return [TranscriptEntry.from_fields(entry_id, f) for entry_id, f in items[::-1]]
+
+
+async def transcript_length(interview_id: str) -> int:
+    return await redis_client.xlen(transcript_key(interview_id))
+
+
+async def transcript_chats(interview_id: str) -> List[dict]:
+    """Whole transcript in the shape stored with interview results."""
+    return [
+        {"type": entry.role, "content": entry.text}
+        for entry in await read_after(interview_id)
+        if entry.text
+    ]
+
+
+class TranscriptChatHistory(BaseChatMessageHistory):
+    """Chat history adapter over the transcript stream. The async api runs on
+    the shared redis pool, the sync one on the sync client."""
+
+    def __init__(
+        self,
+        session_id: str,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.session_id = session_id
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @property
+    def messages(self) -> list[BaseMessage]:
+        items = sync_redis_client.xrange(transcript_key(self.session_id), FIRST)
+        return [TranscriptEntry.from_fields(i, f).to_message() for i, f in items]
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        if not messages:
+            return
+        append_pipeline(
+            sync_redis_client,
+            self.session_id,
+            [TranscriptEntry.from_message(m) for m in messages],
+            self.ttl,
+            self.max_entries,
+        ).execute()
+
+    async def aget_messages(self) -> list[BaseMessage]:
+        return [entry.to_message() for entry in await read_after(self.session_id)]
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        await append_entries(
+            self.session_id,
+            [TranscriptEntry.from_message(m) for m in messages],
+            ttl=self.ttl,
+            max_entries=self.max_entries,
+        )
+
+    def clear(self) -> None:
+        sync_redis_client.delete(transcript_key(self.session_id))
+
+    async def aclear(self) -> None:
+        await redis_client.delete(transcript_key(self.session_id))
+
+
+def get_transcript_history(session_id: str) -> TranscriptChatHistory:
+    return TranscriptChatHistory(
+        session_id=session_id,
+        ttl=settings.HISTORY_TTL_SECONDS,
+        max_entries=settings.HISTORY_MAX_MESSAGES,
+    )
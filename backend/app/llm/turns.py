@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+from .interviewer import load_turn_state, save_interviewer_turn, stream_interviewer
+from .state import InterviewState
+from ..db.keys import turn_key, turn_lock_key
+from ..db.redis import redis_client, INTERVIEW_METADATA_EXPIRY
+from ..db.redis_scripts import extend_lock, release_lock
+
+# a turn is keyed by the answer it replies to: the audio path, a client supplied
+# id or a hash of the typed message and the question it answers. Turns of one
+# interview run one at a time and their result is kept, so a double submit or a
+# workflow retry gets the same question back instead of a second llm call, and
+# every exchange is written to the history once.
+TURN_RESULT_EXPIRY = INTERVIEW_METADATA_EXPIRY
+# the lock is renewed while its turn runs, the ttl only bounds how long a
+# crashed worker blocks the interview
+TURN_LOCK_SECONDS = 60
+TURN_POLL_SECONDS = 0.2
+
+
+class TurnInProgress(Exception):
+    pass
+
+
+def audio_turn_id(audio_path: str) -> str:
+    return f"audio:{audio_path}"
+
+
+def message_turn_id(meta: dict, message: str, client_id: Optional[str] = None) -> str:
+    """Without a client id only resubmits that arrive while the question they
+    answer is still current are recognised, later ones need the client's id."""
+    if client_id:
+        return f"client:{client_id}"
+    digest = hashlib.sha256(
+        f"{meta.get('last_question', '')}\n{message}".encode()
+    ).hexdigest()[:32]
+    return f"msg:{digest}"
+
+
+async def keep_lock(lock_key: str, token: str):
+    while True:
+        await asyncio.sleep(TURN_LOCK_SECONDS / 3)
+        try:
+            if not await extend_lock(lock_key, token, TURN_LOCK_SECONDS):
+                print(f"Turn lock {lock_key} was lost")
+                return
+        except Exception as e:
+            # the next renewal retries, the ttl still covers a few misses
+            print("Failed to extend turn lock:", e)
+
+
+@asynccontextmanager
+async def single_flight(interview_id: str):
+    """Per-interview lock, waits for a running turn for up to TURN_LOCK_SECONDS.
+    Held for as long as the turn runs, however slow the llm is."""
+    lock_key = turn_lock_key(interview_id)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + TURN_LOCK_SECONDS
+    while not await redis_client.set(lock_key, token, nx=True, ex=TURN_LOCK_SECONDS):
+        if time.monotonic() > deadline:
+            raise TurnInProgress(f"A turn of interview {interview_id} is still running")
+        await asyncio.sleep(TURN_POLL_SECONDS)
+
+    keeper = asyncio.create_task(keep_lock(lock_key, token))
+    try:
+        yield
+    finally:
+        keeper.cancel()
+        await release_lock(lock_key, token)
+
+
+async def cached_turn(interview_id: str, turn_id: str) -> Optional[Dict[str, object]]:
+    raw = await redis_client.get(turn_key(interview_id, turn_id))
+    if raw is None:
+        return None
+    print(f"[Turn:{interview_id}] Reusing the result of {turn_id}")
+    return json.loads(raw)
+
+
+async def cache_turn(interview_id: str, turn_id: str, parsed: dict):
+    await redis_client.set(
+        turn_key(interview_id, turn_id), json.dumps(parsed), ex=TURN_RESULT_EXPIRY
+    )
+
+
+async def save_turn_once(
+    interview_id: str, turn_id: str, candidate_input: str, parsed: dict
+) -> bool:
+    saved_key = f"{turn_key(interview_id, turn_id)}:saved"
+    if not await redis_client.set(saved_key, 1, nx=True, ex=TURN_RESULT_EXPIRY):
+        return False
+
+    try:
+        await save_interviewer_turn(interview_id, candidate_input, parsed)
+    except Exception:
+        # let a retry write it
+        await redis_client.delete(saved_key)
+        raise
+    return True
+
+
+async def run_turn_once(
+    interview_id: str,
+    turn_id: str,
+    generate: Callable[[InterviewState], Awaitable[Dict[str, object]]],
+    candidate_input: Optional[str] = None,
+) -> Dict[str, object]:
+    """Result of `generate(state)` for this turn, computed at most once. The
+    turn state is read in one round trip under the lock. With `candidate_input`
+    the exchange is saved to the history as well."""
+    async with single_flight(interview_id):
+        cached = await cached_turn(interview_id, turn_id)
+        if cached is not None:
+            return cached
+
+        parsed = await generate(await load_turn_state(interview_id))
+        if candidate_input is not None:
+            await save_turn_once(interview_id, turn_id, candidate_input, parsed)
+        await cache_turn(interview_id, turn_id, parsed)
+        return parsed
+
+
+async def stream_turn_once(
+    interview_id: str, turn_id: str, candidate_input: str, remaining_seconds: int
+) -> AsyncIterator[tuple[str, object]]:
+    """stream_interviewer for a turn, a duplicate gets the stored question as a
+    single token."""
+    async with single_flight(interview_id):
+        cached = await cached_turn(interview_id, turn_id)
+        if cached is not None:
+            yield "token", cached["question"]
+            yield "done", cached
+            return
+
+        state = await load_turn_state(interview_id)
+        async for kind, value in stream_interviewer(
+            interview_id, state, candidate_input, remaining_seconds
+        ):
+            if kind == "done":
+                await save_turn_once(interview_id, turn_id, candidate_input, value)
+                await cache_turn(interview_id, turn_id, value)
+            yield kind, value
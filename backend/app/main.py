@@ -7,11 +7,17 @@ from .db.pg_conn import init_db
 from starlette.middleware.sessions import SessionMiddleware
 from .router.auth import auth_router
 from .router.interviews import interviews_router
-from .db.redis import redis_client
+from .db.redis import init_redis, close_redis, redis_health
 from .router.upload_files import upload_file_router
+from .services.http_client import get_http_client, close_http_client
+from .services.audio import close_audio_pool
+from .services.speech_to_text import close_stt_backend
+from .services.interview_meta import start_meta_listener, stop_meta_listener
+from .router.transcription import transcription_router
 from inngest.fast_api import serve
 from .inngest.client import inngest_client
 from .inngest.functions.transcription import transcription_workflow
+from .inngest.functions.speculation import speculative_question_workflow
 from .inngest.functions.evaluate_answer import (
     evaluate_user_answer,
     prepare_interview_result,
@@ -21,8 +27,15 @@ from .inngest.functions.evaluate_answer import (
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
-    print(f"[redis connection] : {redis_client.ping()}")
+    await init_redis()
+    start_meta_listener()
+    get_http_client()
     yield
+    await stop_meta_listener()
+    close_audio_pool()
+    close_stt_backend()
+    await close_http_client()
+    await close_redis()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -37,10 +50,16 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(interviews_router)
 app.include_router(upload_file_router)
+app.include_router(transcription_router)
 serve(
     app=app,
     client=inngest_client,
-    functions=[transcription_workflow, evaluate_user_answer, prepare_interview_result],
+    functions=[
+        transcription_workflow,
+        speculative_question_workflow,
+        evaluate_user_answer,
+        prepare_interview_result,
+    ],
 )
 
 
@@ -56,3 +75,12 @@ def handle_exception(req: Request, exc: HTTPException):
 @app.get("/")
 async def root():
     return {"status": "ok"}
+
+
+@app.get("/health")
+async def health():
+    redis_ok = await redis_health()
+    return JSONResponse(
+        status_code=200 if redis_ok else 503,
+        content={"status": "ok" if redis_ok else "degraded", "redis": redis_ok},
+    )
@@ -0,0 +1,13 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+class OpeningQuestion(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    role_fingerprint: str = Field(index=True)
+    job_title: str
+    type: str = Field(default="theory")
+    question: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    __tablename__ = "opening_questions"
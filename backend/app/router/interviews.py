@@ -1,11 +1,10 @@
-import json
 import random
 from typing import Optional
-from fastapi import HTTPException
+from fastapi import BackgroundTasks, HTTPException, Request
 from fastapi.routing import APIRouter
 from urllib.parse import unquote
 
-from app.llm.redis_memory import get_redis_memory
+from ..llm.transcript import get_transcript_history
 from ..models.interview_session import (
     InterviewResults,
     InterviewSession,
@@ -17,28 +16,44 @@ from sqlmodel import select, func
 from ..models.user import User
 from ..services.constants import INTERVIEWERS
 from pydantic import BaseModel
-from ..llm.config import (
-    llm,
-    parse_interview_json,
-    system_prompt,
-    question_parser,
+from ..llm.summary import compact_history
+from ..llm.gateway import LLMOverloaded, ensure_capacity
+from ..llm.scoring import score_answer
+from ..llm.prompt_cache import cache_interview_prompt
+from ..services.question_bank import pick_opening_question
+from ..llm.interviewer import ask_interviewer
+from ..llm.turns import (
+    TurnInProgress,
+    message_turn_id,
+    run_turn_once,
+    stream_turn_once,
 )
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage
 from datetime import datetime, timezone
-from ..db.redis import redis_client, INTERVIEW_METADATA_EXPIRY
+from ..db.redis import INTERVIEW_METADATA_EXPIRY
 from datetime import timedelta
 from ..inngest.client import inngest_client
 from inngest import Event
+from ..services.sse import sse_event, sse_response
+from ..db.keys import answer_status_key
+from ..services.answer_status import (
+    latest_answer_status,
+    watch_answer_status,
+)
+from ..services.interview_meta import get_interview_meta, set_interview_meta
 
 INTERVIEW_DURATION_MINUTES = 10
 REDIS_BUFFER_SECONDS = 60
+LLM_OVERLOADED_MESSAGE = "Interviewer is busy right now, please retry in a few seconds"
+TURN_IN_PROGRESS_MESSAGE = "Your previous answer is still being processed"
 
 
 class CandidateResponse(BaseModel):
     msg: str
     interview_id: str
+    # idempotency key, resubmits of the same answer reuse the first reply. One
+    # per answer (a uuid made at submit), needed once the reply has arrived
+    turn_id: Optional[str] = None
 
 
 interviews_router = APIRouter(prefix="/interview", tags=["interviews"])
@@ -158,22 +173,22 @@ async def start_interview(
         interview.status = InterviewStatus.STARTED
 
         await session.commit()
-        redis_client.hmset(
-            f"interview:{interview_id}:meta",
-            {
-                "job_title": interview.job_title,
-                "job_description": interview.job_description,
-                "candidate_name": currUser.get("email"),
-                "start_time": interview.start_time.isoformat(),
-                "end_time": interview.end_time.isoformat(),
-                "duration_seconds": INTERVIEW_DURATION_MINUTES * 60,
-                "status": "STARTED",
-            },
-        )
-        redis_client.expire(
-            f"interview:{interview_id}:meta",
-            INTERVIEW_METADATA_EXPIRY,
+        meta = {
+            "job_title": interview.job_title,
+            "job_description": interview.job_description,
+            "candidate_name": currUser.get("email"),
+            "start_time": interview.start_time.isoformat(),
+            "end_time": interview.end_time.isoformat(),
+            "duration_seconds": INTERVIEW_DURATION_MINUTES * 60,
+            "status": "STARTED",
+        }
+        opening = await pick_opening_question(
+            session, interview.job_title, interview.job_description
         )
+        if opening:
+            meta["opening_question"] = opening.question
+        await set_interview_meta(interview_id, meta, expire=INTERVIEW_METADATA_EXPIRY)
+        await cache_interview_prompt(interview_id, meta)
         return {
             "interviewId": interview_id,
             "status": InterviewStatus.STARTED,
@@ -196,8 +211,8 @@ async def start_interview(
 )
 async def get_evaluation(interview_id: str, audio_path: str):
     try:
-        meta_key = f"answer:{interview_id}:{audio_path}"
-        data = redis_client.lindex(unquote(meta_key), -1)
+        meta_key = answer_status_key(interview_id, unquote(audio_path))
+        data = await latest_answer_status(meta_key)
 
         if data is None:
             return {
@@ -205,147 +220,204 @@ async def get_evaluation(interview_id: str, audio_path: str):
                 "evaluation_payload": None,
                 "error": None,
             }
-        return json.loads(data)
+        return data
     except Exception as e:
         print("answer eval result error:", e)
         raise HTTPException(500, "Something went wrong while fetching the result")
 
 
-@interviews_router.post("/chat")
-async def chat(req: CandidateResponse, currUser: currentUserDep, session: sessionDep):
-    try:
-        meta_key = f"interview:{req.interview_id}:meta"
-        meta = redis_client.hgetall(meta_key)
+@interviews_router.get(
+    "/evaluation-status/stream",
+    description="Stream answer evaluation status transitions as server sent events",
+)
+async def stream_evaluation(request: Request, interview_id: str, audio_path: str):
+    meta_key = answer_status_key(interview_id, unquote(audio_path))
+
+    async def events():
+        try:
+            async for entry in watch_answer_status(meta_key):
+                if await request.is_disconnected():
+                    return
+                if entry is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse_event("status", entry)
+        except Exception as e:
+            print("answer eval stream error:", e)
+            yield sse_event(
+                "status",
+                {
+                    "status": "error",
+                    "evaluation_payload": None,
+                    "error": "Something went wrong while fetching the result",
+                },
+            )
 
-        if not meta:
-            raise HTTPException(400, "Interview not started or expired")
+    return sse_response(events())
 
-        if meta.get("candidate_name") != currUser.get("email"):
-            raise HTTPException(403, "Access denied")
 
-        # -------- TIME CHECK --------
-        now = datetime.now(timezone.utc)
-        end_time = datetime.fromisoformat(meta["end_time"])
-        remaining_seconds = int((end_time - now).total_seconds())
+async def load_chat_meta(req: CandidateResponse, currUser) -> tuple[dict, int]:
+    # the turn id and the scored question come from the per-turn fields
+    meta = await get_interview_meta(req.interview_id, fresh=True)
 
-        if remaining_seconds <= 0:
-            redis_client.hset(meta_key, "status", InterviewStatus.COMPLETED)
+    if not meta:
+        raise HTTPException(400, "Interview not started or expired")
 
-            interview_res = await session.execute(
-                select(InterviewSession).where(InterviewSession.id == req.interview_id)
-            )
-            interview = interview_res.scalars().first()
-            interview.status = InterviewStatus.COMPLETED
-            await session.commit()
+    if meta.get("candidate_name") != currUser.get("email"):
+        raise HTTPException(403, "Access denied")
 
-            # save final user response in history
-            try:
-                history = get_redis_memory(req.interview_id)
-                history.add_message(HumanMessage(content=req.msg))
-            except Exception as e:
-                print("Failed to store final answer in history:", e)
+    now = datetime.now(timezone.utc)
+    end_time = datetime.fromisoformat(meta["end_time"])
+    return meta, int((end_time - now).total_seconds())
 
-            return {
-                "message": "Interview session has ended.",
-                "remainingSeconds": 0,
-                "interviewer_res": None,
-                "redirect": True,
-            }
 
-        # -------- LLM PROMPT --------
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", system_prompt),
-                MessagesPlaceholder(variable_name="history"),
-                (
-                    "system",
-                    f"Remaining interview time (seconds): {remaining_seconds}. Follow timing rules strictly.",
-                ),
-                ("human", "{candidate_input}"),
-            ]
-        ).partial(format_instructions=question_parser.get_format_instructions())
-
-        def debug(x):
-            print("Prompt Input:", x)
-            return x
-
-        chain = prompt | llm
-
-        chain_with_history = RunnableWithMessageHistory(
-            runnable=chain,
-            get_session_history=get_redis_memory,
-            input_messages_key="candidate_input",
-            history_messages_key="history",
-        )
+async def close_expired_interview(req: CandidateResponse, session) -> dict:
+    await set_interview_meta(req.interview_id, {"status": InterviewStatus.COMPLETED})
 
-        raw_response = chain_with_history.invoke(
-            {
-                "candidate_input": req.msg,
-                "job_title": meta["job_title"],
-                "job_description": meta["job_description"],
-                "candidate_name": meta["candidate_name"].split("@")[0],
-            },
-            config={"configurable": {"session_id": req.interview_id}},
-        )
+    interview_res = await session.execute(
+        select(InterviewSession).where(InterviewSession.id == req.interview_id)
+    )
+    interview = interview_res.scalars().first()
+    interview.status = InterviewStatus.COMPLETED
+    await session.commit()
 
-        print(raw_response.content)
-        response = parse_interview_json(raw_response.content)
-
-        # -------- SAVE CHAT HISTORY --------
-        history = get_redis_memory(req.interview_id)
-        history.add_message(HumanMessage(content=req.msg))
-        history.add_message(
-            AIMessage(
-                content=response.question,
-                additional_kwargs={
-                    "type": response.type,
-                    "question_no": response.question_no,
-                },
-            )
-        )
+    # save final user response in history
+    try:
+        history = get_transcript_history(req.interview_id)
+        await history.aadd_messages([HumanMessage(content=req.msg)])
+    except Exception as e:
+        print("Failed to store final answer in history:", e)
 
-        # -------- UPDATE REDIS AGGREGATE SCORES --------
-        if response.evaluation:
-            try:
-                agg_key = f"interview:{req.interview_id}:aggregate"
-                sug_key = f"interview:{req.interview_id}:suggestions"
+    return {
+        "message": "Interview session has ended.",
+        "remainingSeconds": 0,
+        "interviewer_res": None,
+        "redirect": True,
+    }
 
-                pipe = redis_client.pipeline()
 
-                pipe.hincrbyfloat(
-                    agg_key, "total_comm", response.evaluation.communication
-                )
-                pipe.hincrbyfloat(
-                    agg_key, "total_tech", response.evaluation.technical_knowledge
-                )
-                pipe.hincrbyfloat(agg_key, "total_clarity", response.evaluation.clarity)
-                pipe.hincrby(agg_key, "count", 1)
+def schedule_after_turn(
+    background_tasks: BackgroundTasks,
+    req: CandidateResponse,
+    meta: dict,
+    turn_id: str,
+):
+    # scoring and compaction run after the response is sent, off the reply path
+    background_tasks.add_task(
+        score_answer, req.interview_id, meta.get("last_question"), req.msg, turn_id
+    )
+    background_tasks.add_task(compact_history, req.interview_id)
 
-                pipe.rpush(sug_key, response.evaluation.suggestion)
 
-                pipe.expire(agg_key, 3 * 60 * 60)
-                pipe.expire(sug_key, 3 * 60 * 60)
+def interviewer_payload(response: dict, remaining_seconds: int) -> dict:
+    return {
+        "interviewer_res": {
+            "question": response["question"],
+            "type": response["type"],
+            "question_no": response["question_no"],
+        },
+        "remainingSeconds": remaining_seconds,
+    }
 
-                pipe.execute()
-            except Exception as e:
-                print("Failed to update aggregate:", e)
 
-        return {
-            "interviewer_res": {
-                "question": response.question,
-                "type": response.type,
-                "question_no": response.question_no,
-            },
-            "remainingSeconds": remaining_seconds,
-        }
+@interviews_router.post("/chat")
+async def chat(
+    req: CandidateResponse,
+    currUser: currentUserDep,
+    session: sessionDep,
+    background_tasks: BackgroundTasks,
+):
+    try:
+        meta, remaining_seconds = await load_chat_meta(req, currUser)
+
+        if remaining_seconds <= 0:
+            return await close_expired_interview(req, session)
+
+        turn_id = message_turn_id(meta, req.msg, req.turn_id)
+        response = await run_turn_once(
+            req.interview_id,
+            turn_id,
+            lambda state: ask_interviewer(
+                req.interview_id, state, req.msg, remaining_seconds
+            ),
+            candidate_input=req.msg,
+        )
+        schedule_after_turn(background_tasks, req, meta, turn_id)
+
+        return interviewer_payload(response, remaining_seconds)
 
     except HTTPException:
         raise
+    except LLMOverloaded as e:
+        print("Chat shed:", e)
+        raise HTTPException(429, LLM_OVERLOADED_MESSAGE)
+    except TurnInProgress as e:
+        print("Chat rejected:", e)
+        raise HTTPException(409, TURN_IN_PROGRESS_MESSAGE)
     except Exception as e:
         print("❌ Chat Error:", e)
         raise HTTPException(500, "Something went wrong while talking to interviewer")
 
 
+@interviews_router.post(
+    "/chat/stream",
+    description="stream the interviewer question as server sent events (token -> done)",
+)
+async def chat_stream(
+    req: CandidateResponse,
+    currUser: currentUserDep,
+    session: sessionDep,
+    background_tasks: BackgroundTasks,
+):
+    try:
+        meta, remaining_seconds = await load_chat_meta(req, currUser)
+
+        if remaining_seconds <= 0:
+            ended = await close_expired_interview(req, session)
+
+            async def ended_events():
+                yield sse_event("done", ended)
+
+            return sse_response(ended_events())
+
+        ensure_capacity()
+        turn_id = message_turn_id(meta, req.msg, req.turn_id)
+
+    except HTTPException:
+        raise
+    except LLMOverloaded as e:
+        print("Chat stream shed:", e)
+        raise HTTPException(429, LLM_OVERLOADED_MESSAGE)
+    except Exception as e:
+        print("❌ Chat Stream Error:", e)
+        raise HTTPException(500, "Something went wrong while talking to interviewer")
+
+    async def events():
+        try:
+            async for kind, value in stream_turn_once(
+                req.interview_id, turn_id, req.msg, remaining_seconds
+            ):
+                if kind == "token":
+                    yield sse_event("token", {"delta": value})
+                    continue
+
+                yield sse_event("done", interviewer_payload(value, remaining_seconds))
+        except LLMOverloaded as e:
+            print("Chat stream shed:", e)
+            yield sse_event("error", {"error": LLM_OVERLOADED_MESSAGE, "status": 429})
+        except TurnInProgress as e:
+            print("Chat stream rejected:", e)
+            yield sse_event("error", {"error": TURN_IN_PROGRESS_MESSAGE, "status": 409})
+        except Exception as e:
+            print("❌ Chat Stream Error:", e)
+            yield sse_event(
+                "error", {"error": "Something went wrong while talking to interviewer"}
+            )
+
+    schedule_after_turn(background_tasks, req, meta, turn_id)
+    return sse_response(events())
+
+
 @interviews_router.get(
     "/result/{interview_id}", description="get interview result by id"
 )
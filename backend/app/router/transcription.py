@@ -0,0 +1,194 @@
+import asyncio
+import json
+import secrets
+import tempfile
+import uuid
+from typing import AsyncIterator, BinaryIO, Optional
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+from ..config import settings
+from ..db.keys import chunk_counter_key
+from ..db.redis import AUDIO_METADATA_EXPIRY
+from ..db.redis_scripts import next_chunk
+from ..inngest.functions.transcription import complete_transcription
+from ..router.upload_files import check_interview_owner
+from ..db.keys import answer_status_key
+from ..services.answer_status import (
+    append_meta_log,
+    mark_answer_uploaded,
+    save_live_transcript,
+)
+from ..services.jwt_service import user_from_token
+from ..services.speech_to_text import EMPTY_TRANSCRIPT, get_stt_backend
+from ..services.storage import file_body, upload_object_stream
+
+# frames buffered between the socket and the speech-to-text backend
+STREAM_QUEUE_SIZE = 256
+RECORDING_SPOOL_BYTES = 1024 * 1024
+# the client left before finishing the answer, watchers shouldn't wait for it
+ABANDONED_STATUS = {
+    "status": "error",
+    "evaluation_payload": None,
+    "error": "Answer was abandoned before it finished",
+}
+
+transcription_router = APIRouter(prefix="/transcription", tags=["transcription"])
+
+
+@transcription_router.post(
+    "/speechmatics/callback",
+    description="speechmatics job notification -> emits interview/transcription.completed",
+)
+async def speechmatics_callback(
+    request: Request, id: str, status: str, interview_id: str, audio_path: str
+):
+    expected = f"Bearer {settings.SPEECHMATICS_WEBHOOK_SECRET}"
+    if not secrets.compare_digest(request.headers.get("authorization", ""), expected):
+        raise HTTPException(401, "Invalid callback credentials")
+
+    try:
+        if status != "success":
+            await append_meta_log(
+                answer_status_key(interview_id, audio_path),
+                {
+                    "status": "error",
+                    "evaluation_payload": None,
+                    "error": f"Transcription job {id} finished with status {status}",
+                },
+            )
+            return {"received": True}
+
+        transcript = (await request.body()).decode("utf-8").strip()
+        await complete_transcription(
+            id, interview_id, audio_path, transcript or EMPTY_TRANSCRIPT
+        )
+        return {"received": True}
+
+    except Exception as e:
+        print("Speechmatics callback error:", e)
+        raise HTTPException(500, "Something went wrong while handling transcript")
+
+
+async def receive_frames(
+    websocket: WebSocket,
+    frames: asyncio.Queue,
+    recording: BinaryIO,
+    interview_id: str,
+    audio_path: str,
+) -> bool:
+    """Feeds binary frames into `frames` until the client sends {"type": "end"},
+    True when the answer was finished and not abandoned."""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return False
+
+            if message.get("bytes"):
+                await asyncio.to_thread(recording.write, message["bytes"])
+                if recording.tell() > settings.MAX_AUDIO_UPLOAD_BYTES:
+                    raise ValueError("Audio recording is too large")
+                await frames.put(message["bytes"])
+            elif (
+                message.get("text") and json.loads(message["text"]).get("type") == "end"
+            ):
+                await mark_answer_uploaded(interview_id, audio_path)
+                return True
+    finally:
+        await frames.put(None)
+
+
+async def queued_frames(frames: asyncio.Queue) -> AsyncIterator[bytes]:
+    while (frame := await frames.get()) is not None:
+        yield frame
+
+
+@transcription_router.websocket("/stream/{interview_id}")
+async def stream_transcription(websocket: WebSocket, interview_id: str):
+    """Binary webm frames in, {"type": "partial" | "final", "text"} out. The
+    final transcript goes straight to evaluation, no batch job is involved."""
+    await websocket.accept()
+    try:
+        user = user_from_token(websocket.cookies.get("access_token"))
+        await check_interview_owner(interview_id, user)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+
+    chunk_number = await next_chunk(
+        chunk_counter_key(interview_id), AUDIO_METADATA_EXPIRY
+    )
+    audio_path = f"audio/{interview_id}/{chunk_number}.webm"
+    meta_key = answer_status_key(interview_id, audio_path)
+    await append_meta_log(
+        meta_key,
+        {"status": "transcription_started", "evaluation_payload": None, "error": None},
+    )
+    await websocket.send_json(
+        {"type": "started", "audio_path": audio_path, "chunk_number": chunk_number}
+    )
+
+    # kept for storage, spills to disk past RECORDING_SPOOL_BYTES
+    with tempfile.SpooledTemporaryFile(max_size=RECORDING_SPOOL_BYTES) as recording:
+        await relay_answer(websocket, interview_id, audio_path, recording)
+
+
+async def relay_answer(
+    websocket: WebSocket, interview_id: str, audio_path: str, recording: BinaryIO
+):
+    meta_key = answer_status_key(interview_id, audio_path)
+    frames: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    receiver = asyncio.create_task(
+        receive_frames(websocket, frames, recording, interview_id, audio_path)
+    )
+
+    try:
+        transcript = ""
+        async for segment in get_stt_backend().stream(queued_frames(frames)):
+            transcript = segment.text
+            await save_live_transcript(
+                interview_id, audio_path, transcript, segment.is_final
+            )
+            await websocket.send_json(
+                {"type": "final" if segment.is_final else "partial", "text": transcript}
+            )
+
+        if not await receiver:
+            await append_meta_log(meta_key, ABANDONED_STATUS)
+            return
+
+        await complete_transcription(
+            f"stream-{uuid.uuid4().hex}",
+            interview_id,
+            audio_path,
+            transcript or EMPTY_TRANSCRIPT,
+        )
+
+    except WebSocketDisconnect:
+        receiver.cancel()
+        await append_meta_log(meta_key, ABANDONED_STATUS)
+        return
+    except Exception as e:
+        receiver.cancel()
+        print("Streaming transcription error:", e)
+        await append_meta_log(
+            meta_key, {"status": "error", "evaluation_payload": None, "error": str(e)}
+        )
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close(code=1011, reason="Transcription failed")
+        return
+
+    # evaluation is already running and owns the answer status from here, keep
+    # the recording like batch uploads do but only log when that fails
+    try:
+        await upload_object_stream(
+            "interviewly",
+            audio_path,
+            file_body(recording),
+            size=recording.tell(),
+            upsert=True,
+        )
+    except Exception as e:
+        print("Streaming recording upload error:", e)
+    if websocket.client_state == WebSocketState.CONNECTED:
+        await websocket.close()
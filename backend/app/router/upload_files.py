@@ -1,10 +1,23 @@
+import re
+from typing import AsyncIterator
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from fastapi.responses import JSONResponse
-from ..db.supabase import supabase_client
 from ..inngest.client import inngest_client
 from inngest import Event
 from pydantic import BaseModel
-from ..db.redis import redis_client
+from ..db.keys import answer_key, chunk_counter_key
+from ..db.redis import AUDIO_METADATA_EXPIRY
+from ..db.redis_scripts import complete_chunk, next_chunk
+from ..config import settings
+from ..dependenices import currentUserDep
+from ..services.answer_status import mark_answer_uploaded
+from ..services.interview_meta import get_interview_meta
+from ..services.http_client import STREAM_CHUNK_SIZE, limit_stream
+from ..services.storage import (
+    create_signed_upload_url,
+    object_size,
+    upload_object_stream,
+)
 
 
 class AudioUploadedData(BaseModel):
@@ -12,75 +25,174 @@ class AudioUploadedData(BaseModel):
     interview_id: str
 
 
+class SignedUploadReq(BaseModel):
+    interview_id: str
+
+
+class UploadCompleteReq(BaseModel):
+    interview_id: str
+    audio_path: str
+
+
 upload_file_router = APIRouter(prefix="/upload", tags=["upload files"])
 
 
-def get_signed_url(bucket, path):
-    url = supabase_client.storage.from_(bucket).create_signed_upload_url(path)
-    return url
+async def get_signed_url(bucket, path):
+    return await create_signed_upload_url(bucket, path)
 
 
-def upload_to_supabase(bucket: str, path: str, file_bytes: bytes):
-    response = supabase_client.storage.from_(bucket).upload(
-        path=path, file=file_bytes, file_options={"content-type": "audio/webm"}
+async def check_interview_owner(interview_id: str, currUser):
+    meta = await get_interview_meta(interview_id)
+    candidate = meta.get("candidate_name")
+    if not candidate:
+        raise HTTPException(400, "Interview not started or expired")
+    if candidate != currUser.get("email"):
+        raise HTTPException(403, "Access denied")
+
+
+async def emit_audio_uploaded(interview_id: str, chunk_number: int, path: str):
+    job_data = {
+        "audio_path": path,
+        "interview_id": interview_id,
+        "chunk_number": chunk_number,
+        "filename": path.rsplit("/", 1)[-1],
+    }
+
+    await mark_answer_uploaded(interview_id, path)
+    job = await inngest_client.send(
+        Event(
+            name="interview/audio.uploaded",
+            data=job_data,
+        )
     )
 
-    print(response)
-    if response.path:
-        return response.path
-    raise Exception("Something went wrong while uploading audio")
+    return {"job_id": job[0], **job_data}
 
 
-@upload_file_router.get("/{interview_id}/{chunk}")
-def upload_audio_signed_url(interview_id: str, chunk: str):
-    try:
-        path = f"audio/{interview_id}/{chunk}.webm"
-        url = get_signed_url("interviewly", path)
+async def read_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    await file.seek(0)
+    while chunk := await file.read(STREAM_CHUNK_SIZE):
+        yield chunk
 
-        return {"url": url["signed_url"]}
-    except HTTPException:
-        raise
+
+async def upload_to_supabase(bucket: str, path: str, file: UploadFile):
+    try:
+        return await upload_object_stream(
+            bucket,
+            path,
+            lambda: limit_stream(read_upload(file), settings.MAX_AUDIO_UPLOAD_BYTES),
+            size=file.size,
+            # chunk paths are unique per counter, a retried POST that already
+            # landed must overwrite instead of failing with 409 Duplicate
+            upsert=True,
+        )
     except Exception as e:
         print(e)
-        raise HTTPException(
-            status_code=500,
-            detail="Something went wrong while generatins signed upload url",
-        )
+        raise Exception("Something went wrong while uploading audio")
 
 
 @upload_file_router.post("/")
 async def upload_file(
+    currUser: currentUserDep,
     interview_id: str = Form(...),
     file: UploadFile = File(...),
 ):
     try:
-        audio_chunk_seq_key = f"audio_chunk:{interview_id}"
-        chunk_number = redis_client.incr(audio_chunk_seq_key)
+        await check_interview_owner(interview_id, currUser)
+
+        if file.size is not None and file.size > settings.MAX_AUDIO_UPLOAD_BYTES:
+            raise HTTPException(413, "Audio recording is too large")
+
+        chunk_number = await next_chunk(
+            chunk_counter_key(interview_id), AUDIO_METADATA_EXPIRY
+        )
 
         filename = f"{chunk_number}.webm"
         path = f"audio/{interview_id}/{filename}"
 
-        file_bytes = await file.read()
-        upload_to_supabase("interviewly", path, file_bytes)
-
-        job_data = {
-            "audio_path": path,
-            "interview_id": interview_id,
-            "chunk_number": chunk_number,
-            "filename": filename,
-        }
-
-        job = await inngest_client.send(
-            Event(
-                name="interview/audio.uploaded",
-                data=job_data,
-            )
-        )
+        await upload_to_supabase("interviewly", path, file)
+        job_data = await emit_audio_uploaded(interview_id, chunk_number, path)
 
-        return {"message": "Upload successful!", "job_id": job[0], **job_data}
+        return {"message": "Upload successful!", **job_data}
 
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"error": str(e)},
         )
+
+
+@upload_file_router.post(
+    "/signed-url",
+    description="allocate the next audio chunk and a signed url to upload it directly to storage",
+)
+async def allocate_signed_upload(req: SignedUploadReq, currUser: currentUserDep):
+    try:
+        await check_interview_owner(req.interview_id, currUser)
+
+        chunk_number = await next_chunk(
+            chunk_counter_key(req.interview_id), AUDIO_METADATA_EXPIRY
+        )
+        path = f"audio/{req.interview_id}/{chunk_number}.webm"
+        url = await get_signed_url("interviewly", path)
+
+        return {"url": url, "audio_path": path, "chunk_number": chunk_number}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(e)
+        raise HTTPException(
+            status_code=500,
+            detail="Something went wrong while generatins signed upload url",
+        )
+
+
+@upload_file_router.post(
+    "/complete",
+    description="confirm a direct upload and start transcription",
+)
+async def complete_upload(req: UploadCompleteReq, currUser: currentUserDep):
+    try:
+        await check_interview_owner(req.interview_id, currUser)
+
+        match = re.fullmatch(
+            rf"audio/{re.escape(req.interview_id)}/(\d+)\.webm", req.audio_path
+        )
+        if not match:
+            raise HTTPException(400, "Unknown audio upload")
+
+        size = await object_size("interviewly", req.audio_path)
+        if not size:
+            raise HTTPException(400, "Audio was not uploaded")
+        if size > settings.MAX_AUDIO_UPLOAD_BYTES:
+            raise HTTPException(413, "Audio recording is too large")
+
+        # retried completions must not start a second transcription
+        first = await complete_chunk(
+            chunk_counter_key(req.interview_id),
+            answer_key(req.interview_id, req.audio_path, "upload_complete"),
+            int(match.group(1)),
+            AUDIO_METADATA_EXPIRY,
+        )
+        if first is None:
+            raise HTTPException(400, "Unknown audio upload")
+        if not first:
+            return {
+                "message": "Upload already completed",
+                "audio_path": req.audio_path,
+                "interview_id": req.interview_id,
+            }
+
+        job_data = await emit_audio_uploaded(
+            req.interview_id, int(match.group(1)), req.audio_path
+        )
+        return {"message": "Upload successful!", **job_data}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(e)
+        raise HTTPException(500, "Something went wrong while completing upload")
@@ -0,0 +1,110 @@
+import json
+import time
+from typing import AsyncIterator, Optional
+from ..db.keys import answer_key
+from ..db.redis import redis_client, redis_stream_client, AUDIO_METADATA_EXPIRY
+from ..db.redis_scripts import append_status
+from .metrics import record_sample
+
+# every answer gets a short redis stream of status transitions, readers block on
+# XREAD instead of polling for the latest entry
+ANSWER_STATUS_MAXLEN = 50
+STATUS_BLOCK_MS = 15_000
+STATUS_WATCH_TIMEOUT = 5 * 60  # 5 mins
+TERMINAL_STATUSES = ("evaluation_completed", "preparing_result", "error")
+
+
+async def append_meta_log(meta_key: str, payload: dict):
+    entry = {
+        "ts": int(time.time()),
+        **payload,
+    }
+    await append_status(
+        meta_key, json.dumps(entry), ANSWER_STATUS_MAXLEN, AUDIO_METADATA_EXPIRY
+    )
+
+
+async def latest_answer_status(meta_key: str) -> Optional[dict]:
+    entries = await redis_client.xrevrange(meta_key, count=1)
+    if not entries:
+        return None
+    _, fields = entries[0]
+    return json.loads(fields["data"])
+
+
+async def watch_answer_status(
+    meta_key: str, last_id: str = "0-0"
+) -> AsyncIterator[Optional[dict]]:
+    """Yields every status entry after `last_id` as soon as it is written and
+    stops after a terminal status. Yields None when a block window passes with
+    no new entry so callers can send keep-alives or check for disconnects."""
+    deadline = time.monotonic() + STATUS_WATCH_TIMEOUT
+
+    while time.monotonic() < deadline:
+        response = await redis_stream_client.xread(
+            {meta_key: last_id}, count=10, block=STATUS_BLOCK_MS
+        )
+        if not response:
+            yield None
+            continue
+
+        for _, entries in response:
+            for entry_id, fields in entries:
+                last_id = entry_id
+                entry = json.loads(fields["data"])
+                yield entry
+                if entry.get("status") in TERMINAL_STATUSES:
+                    return
+
+    yield {
+        "ts": int(time.time()),
+        "status": "error",
+        "evaluation_payload": None,
+        "error": "Timed out waiting for answer evaluation",
+    }
+
+
+# answer uploaded -> next question ready
+QUESTION_LATENCY_KEY = "metrics:answer_to_question_ms"
+
+
+def uploaded_at_key(interview_id: str, audio_path: str) -> str:
+    return answer_key(interview_id, audio_path, "uploaded_at")
+
+
+async def mark_answer_uploaded(interview_id: str, audio_path: str):
+    await redis_client.set(
+        uploaded_at_key(interview_id, audio_path),
+        time.time(),
+        ex=AUDIO_METADATA_EXPIRY,
+    )
+
+
+async def record_question_latency(
+    interview_id: str, audio_path: str, speculative: bool
+) -> Optional[int]:
+    uploaded_at = await redis_client.getdel(uploaded_at_key(interview_id, audio_path))
+    if not uploaded_at:
+        return None
+
+    latency_ms = int((time.time() - float(uploaded_at)) * 1000)
+    await record_sample(
+        QUESTION_LATENCY_KEY, {"ms": latency_ms, "speculative": speculative}
+    )
+
+    print(
+        f"[Metrics:{interview_id}] answer_to_question_ms={latency_ms} speculative={speculative}"
+    )
+    return latency_ms
+
+
+def live_transcript_key(interview_id: str, audio_path: str) -> str:
+    return answer_key(interview_id, audio_path, "transcript")
+
+
+async def save_live_transcript(
+    interview_id: str, audio_path: str, text: str, is_final: bool
+):
+    key = live_transcript_key(interview_id, audio_path)
+    await redis_client.hset(key, mapping={"text": text, "final": int(is_final)})
+    await redis_client.expire(key, AUDIO_METADATA_EXPIRY)
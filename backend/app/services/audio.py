@@ -0,0 +1,198 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TypeVar, Union
+import av
+import numpy as np
+from pydantic import BaseModel
+from ..config import settings
+from .http_client import STREAM_CHUNK_SIZE, limit_stream
+from .storage import file_body, stream_object, upload_object_stream
+
+# recordings are checked and normalized locally before any speech-to-text job is
+# paid for, decoding and encoding run in a process pool off the event loop. The
+# recording goes through temp files both ways, only the path reaches the pool
+SAMPLE_RATE = 16_000
+FRAME_MS = 30
+TRIM_PADDING_MS = 300
+ENCODE_FRAME_SIZE = SAMPLE_RATE * 20 // 1000  # 20 ms opus frames
+
+_pool: Optional[ProcessPoolExecutor] = None
+T = TypeVar("T")
+
+
+class AudioStats(BaseModel):
+    duration_seconds: float
+    speech_seconds: float
+
+    @property
+    def has_speech(self) -> bool:
+        return self.speech_seconds >= settings.MIN_SPEECH_SECONDS
+
+
+def get_audio_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.AUDIO_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_in_audio_pool(fn: Callable[..., T], *args) -> T:
+    pool = get_audio_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # a worker died (out of memory, a crashing codec) and the pool refuses
+        # all further work, the next recording starts a fresh one
+        if _pool is pool:
+            close_audio_pool()
+        raise
+
+
+def close_audio_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def decode_mono(source: Union[bytes, str], rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decodes raw bytes or a file in any container/codec ffmpeg understands to
+    mono float32 samples."""
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=rate)
+    chunks = []
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with av.open(source) as container:
+        for frame in container.decode(audio=0):
+            for resampled in resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        for resampled in resampler.resample(None):
+            chunks.append(resampled.to_ndarray().reshape(-1))
+
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks)
+
+
+def frame_levels(samples: np.ndarray, rate: int = SAMPLE_RATE) -> np.ndarray:
+    """RMS level of every FRAME_MS frame in dBFS."""
+    frame_size = rate * FRAME_MS // 1000
+    frame_count = len(samples) // frame_size
+    if not frame_count:
+        return np.zeros(0, dtype=np.float32)
+
+    frames = samples[: frame_count * frame_size].reshape(frame_count, frame_size)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def trim_silence(samples: np.ndarray, voiced: np.ndarray) -> np.ndarray:
+    frame_size = SAMPLE_RATE * FRAME_MS // 1000
+    padding = SAMPLE_RATE * TRIM_PADDING_MS // 1000
+    indexes = np.flatnonzero(voiced)
+    if not len(indexes):
+        return samples
+
+    start = max(indexes[0] * frame_size - padding, 0)
+    end = min((indexes[-1] + 1) * frame_size + padding, len(samples))
+    return samples[start:end]
+
+
+def encode_opus(samples: np.ndarray, bitrate: int, target: str):
+    with av.open(target, "w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=SAMPLE_RATE, layout="mono")
+        stream.bit_rate = bitrate
+        for start in range(0, len(samples), ENCODE_FRAME_SIZE):
+            chunk = samples[start : start + ENCODE_FRAME_SIZE]
+            frame = av.AudioFrame.from_ndarray(
+                chunk.reshape(1, -1), format="flt", layout="mono"
+            )
+            frame.sample_rate = SAMPLE_RATE
+            frame.pts = start
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+
+def process_recording(
+    source: str, target: str, speech_dbfs: float, bitrate: int
+) -> tuple[AudioStats, bool]:
+    """Decodes `source` once, measures voice activity and, when there is speech,
+    writes the trimmed 16 kHz mono re-encode to `target`. True when it did."""
+    samples = decode_mono(source)
+    voiced = frame_levels(samples) > speech_dbfs
+    stats = AudioStats(
+        duration_seconds=len(samples) / SAMPLE_RATE,
+        speech_seconds=np.count_nonzero(voiced) * FRAME_MS / 1000,
+    )
+    if not stats.has_speech:
+        return stats, False
+
+    encode_opus(trim_silence(samples, voiced), bitrate, target)
+    return stats, True
+
+
+def normalized_path(path: str) -> str:
+    base, _, _ = path.rpartition(".")
+    return f"{base}.normalized.webm"
+
+
+async def download_to_file(bucket: str, path: str, file) -> int:
+    size = 0
+    async with stream_object(bucket, path) as response:
+        chunks = response.aiter_bytes(STREAM_CHUNK_SIZE)
+        async for chunk in limit_stream(chunks, settings.MAX_AUDIO_UPLOAD_BYTES):
+            await asyncio.to_thread(file.write, chunk)
+            size += len(chunk)
+    await asyncio.to_thread(file.flush)
+    return size
+
+
+async def prepare_recording(bucket: str, path: str) -> dict:
+    """Stats plus the path speech-to-text should read, the original path when
+    the recording can't be decoded so the speech-to-text service decides."""
+    with (
+        tempfile.NamedTemporaryFile(suffix=".webm") as original,
+        tempfile.NamedTemporaryFile(suffix=".webm") as normalized,
+    ):
+        original_bytes = await download_to_file(bucket, path, original)
+        try:
+            stats, encoded = await run_in_audio_pool(
+                process_recording,
+                original.name,
+                normalized.name,
+                settings.SPEECH_RMS_DBFS,
+                settings.NORMALIZED_AUDIO_BITRATE,
+            )
+        except Exception as e:
+            print(f"Audio processing failed for {path}:", e)
+            return {"has_speech": True, "audio_path": path}
+
+        result = {
+            "has_speech": stats.has_speech,
+            "audio_path": path,
+            **stats.model_dump(),
+        }
+        normalized_bytes = os.path.getsize(normalized.name) if encoded else 0
+        if not encoded or normalized_bytes >= original_bytes:
+            return result
+
+        result["audio_path"] = await upload_object_stream(
+            bucket,
+            normalized_path(path),
+            file_body(normalized),
+            size=normalized_bytes,
+            upsert=True,
+        )
+        result["normalized_bytes"] = normalized_bytes
+        result["original_bytes"] = original_bytes
+        return result
@@ -0,0 +1,121 @@
+import asyncio
+import secrets
+from typing import AsyncIterator, Callable, Optional
+import httpx
+from ..config import settings
+
+SPEECHMATICS_HOST = "https://eu1.asr.api.speechmatics.com"
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _host_transport() -> httpx.AsyncHTTPTransport:
+    return httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=1,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            keepalive_expiry=60,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client, every upstream host gets its own connection pool."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=10),
+            mounts={
+                SPEECHMATICS_HOST: _host_transport(),
+                settings.SUPABASE_URL.rstrip("/"): _host_transport(),
+            },
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def request_with_retry(
+    method: str,
+    url: str,
+    content_factory: Optional[Callable[[], AsyncIterator[bytes]]] = None,
+    **kwargs,
+) -> httpx.Response:
+    """Retries connection errors, timeouts and 429/5xx with exponential backoff.
+    Streamed bodies can't be replayed, pass `content_factory` to get a fresh
+    body iterator for every attempt instead of `content`."""
+    client = get_http_client()
+    attempt = 0
+
+    while True:
+        if content_factory is not None:
+            kwargs["content"] = content_factory()
+        try:
+            response = await client.request(method, url, **kwargs)
+            if (
+                response.status_code not in RETRY_STATUS_CODES
+                or attempt >= settings.HTTP_MAX_RETRIES
+            ):
+                return response
+        except (httpx.TransportError, httpx.TimeoutException):
+            if attempt >= settings.HTTP_MAX_RETRIES:
+                raise
+
+        await asyncio.sleep(settings.HTTP_RETRY_BACKOFF * 2**attempt)
+        attempt += 1
+
+
+async def limit_stream(
+    chunks: AsyncIterator[bytes], max_bytes: int
+) -> AsyncIterator[bytes]:
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise ValueError(f"Stream exceeds the {max_bytes} bytes limit")
+        yield chunk
+
+
+def stream_multipart(
+    fields: dict,
+    file_field: str,
+    filename: str,
+    content_type: str,
+    chunks: AsyncIterator[bytes],
+    size: Optional[int] = None,
+) -> tuple[dict, AsyncIterator[bytes]]:
+    """multipart/form-data body that relays `chunks` without buffering them.
+    Returns the request headers (with Content-Length when `size` is known)."""
+    boundary = secrets.token_hex(16)
+    head = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+        f"{value}\r\n".encode()
+        for name, value in fields.items()
+    )
+    head += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+        f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    if size is not None:
+        headers["Content-Length"] = str(len(head) + size + len(tail))
+
+    async def body():
+        yield head
+        async for chunk in chunks:
+            yield chunk
+        yield tail
+
+    return headers, body()
@@ -0,0 +1,113 @@
+import asyncio
+import uuid
+from typing import Optional
+from ..config import settings
+from ..db.keys import meta_key
+from ..db.redis import redis_client, redis_stream_client
+from .cache import TTLCache
+
+# interview metadata is read on every turn but written only at start, once per
+# turn and at completion, so each worker keeps a local copy of the fields set at
+# start (owner, timing, prompt inputs). Fields every turn moves on are never
+# cached, a worker that didn't write them would pair an answer with the wrong
+# question, callers that need them read the hash with fresh=True. Writers
+# publish the interview id, every other worker drops its copy. The cache is
+# only used while subscribed, a missed message can't leave a stale entry for
+# longer than META_CACHE_TTL.
+META_CHANNEL = "interview:meta:invalidate"
+TURN_FIELDS = ("question_no", "last_question", "last_type", "status")
+INSTANCE_ID = uuid.uuid4().hex
+
+_meta_cache = TTLCache(maxsize=settings.META_CACHE_SIZE, ttl=settings.META_CACHE_TTL)
+_listener: Optional[asyncio.Task] = None
+_subscribed = False
+# bumped on every local write or invalidation, a read that raced one isn't cached
+_changes = 0
+
+
+def redis_value(value) -> str:
+    # how redis returns a written value, str enums are stored as their value
+    return value if isinstance(value, str) else str(value)
+
+
+def without_turn_fields(meta: dict) -> dict:
+    return {k: v for k, v in meta.items() if k not in TURN_FIELDS}
+
+
+async def get_interview_meta(interview_id: str, fresh: bool = False) -> dict:
+    """Interview metadata hash, empty when the interview isn't started or expired.
+    TURN_FIELDS are only included with `fresh`, which always reads redis."""
+    if _subscribed and not fresh:
+        cached = _meta_cache.get(interview_id)
+        if cached is not None:
+            return dict(cached)
+
+    seen = _changes
+    meta = await redis_client.hgetall(meta_key(interview_id))
+    if meta and _subscribed and seen == _changes:
+        _meta_cache.set(interview_id, without_turn_fields(meta))
+    return dict(meta) if fresh else without_turn_fields(meta)
+
+
+async def set_interview_meta(
+    interview_id: str, mapping: dict, expire: Optional[int] = None
+):
+    global _changes
+    _changes += 1
+    pipe = redis_client.pipeline()
+    pipe.hset(meta_key(interview_id), mapping=mapping)
+    if expire:
+        pipe.expire(meta_key(interview_id), expire)
+    pipe.publish(META_CHANNEL, f"{INSTANCE_ID}:{interview_id}")
+    await pipe.execute()
+
+    cached = _meta_cache.get(interview_id)
+    if cached is not None:
+        _meta_cache.set(
+            interview_id,
+            {
+                **cached,
+                **without_turn_fields({k: redis_value(v) for k, v in mapping.items()}),
+            },
+        )
+
+
+async def listen_for_invalidations():
+    global _subscribed, _changes
+    while True:
+        pubsub = redis_stream_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(META_CHANNEL)
+            _subscribed = True
+            async for message in pubsub.listen():
+                sender, _, interview_id = message["data"].partition(":")
+                if sender != INSTANCE_ID:
+                    _changes += 1
+                    _meta_cache.pop(interview_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("Interview meta invalidation listener failed:", e)
+        finally:
+            # updates may be missed until subscribed again
+            _subscribed = False
+            _meta_cache.clear()
+            await pubsub.aclose()
+        await asyncio.sleep(1)
+
+
+def start_meta_listener():
+    global _listener
+    if _listener is None:
+        _listener = asyncio.create_task(listen_for_invalidations())
+
+
+async def stop_meta_listener():
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
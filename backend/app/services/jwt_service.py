@@ -12,7 +12,10 @@ def encode_jwt(data):
 
 
 def get_current_user(request: Request):
-    token = request.cookies.get("access_token")
+    return user_from_token(request.cookies.get("access_token"))
+
+
+def user_from_token(token):
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
@@ -0,0 +1,35 @@
+import asyncio
+import json
+from ..db.redis import redis_client, sync_redis_client
+
+# metrics are capped redis lists of recent samples, newest first
+METRIC_SAMPLES = 1000
+# samples written in the background, kept referenced until they finish
+_pending: set[asyncio.Task] = set()
+
+
+async def record_sample(key: str, sample: dict):
+    pipe = redis_client.pipeline()
+    pipe.lpush(key, json.dumps(sample))
+    pipe.ltrim(key, 0, METRIC_SAMPLES - 1)
+    await pipe.execute()
+
+
+def record_sample_sync(key: str, sample: dict):
+    pipe = sync_redis_client.pipeline()
+    pipe.lpush(key, json.dumps(sample))
+    pipe.ltrim(key, 0, METRIC_SAMPLES - 1)
+    pipe.execute()
+
+
+def record_sample_soon(key: str, sample: dict):
+    """record_sample off the caller's critical path, failures are only logged."""
+    task = asyncio.create_task(record_sample(key, sample))
+    _pending.add(task)
+    task.add_done_callback(lambda done: sample_recorded(key, done))
+
+
+def sample_recorded(key: str, task: asyncio.Task):
+    _pending.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Failed to record {key} sample:", task.exception())
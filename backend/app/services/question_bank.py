@@ -0,0 +1,92 @@
+import hashlib
+import re
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from sqlmodel import select, func
+from langchain_core.prompts import PromptTemplate
+from ..llm.config import InterviewQuestion
+from ..llm.structured import structured_llm
+from ..models.question_bank import OpeningQuestion
+
+# the first question only depends on the role, so for known roles (job templates)
+# it is generated ahead of time and served without an llm round trip
+
+
+def role_fingerprint(job_title: str, job_description: str) -> str:
+    normalized = " ".join(f"{job_title}\n{job_description}".lower().split())
+    return hashlib.sha256(normalized.encode()).hexdigest()[:32]
+
+
+async def pick_opening_question(
+    session, job_title: str, job_description: str
+) -> Optional[OpeningQuestion]:
+    result = await session.execute(
+        select(OpeningQuestion)
+        .where(
+            OpeningQuestion.role_fingerprint
+            == role_fingerprint(job_title, job_description)
+        )
+        .order_by(func.random())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+class OpeningQuestions(BaseModel):
+    questions: List[InterviewQuestion] = Field(
+        description="Distinct opening interview questions"
+    )
+
+
+opening_prompt = PromptTemplate(
+    template="""You are an expert technical interviewer preparing the FIRST question of interviews for the role of {job_title}.
+
+## JOB DESCRIPTION
+{job_description}
+
+Write {count} distinct foundational theory questions, each a good opening question:
+- Tests one fundamental concept from the job description
+- Beginner to intermediate difficulty, 1-2 sentences, ends with a question mark
+- No hints, no yes/no questions, no "tell me about yourself"
+- Every question has "type": "theory" and "question_no": 1
+""",
+    input_variables=["job_title", "job_description", "count"],
+)
+opening_chain = opening_prompt | structured_llm("question_bank", OpeningQuestions)
+
+
+def is_valid_opening(question: InterviewQuestion) -> bool:
+    text = question.question.strip()
+    return (
+        question.type == "theory"
+        and question.question_no == 1
+        and 15 <= len(text) <= 300
+        and text.endswith("?")
+    )
+
+
+async def generate_opening_questions(
+    job_title: str, job_description: str, count: int
+) -> List[OpeningQuestion]:
+    generated = await opening_chain.ainvoke(
+        {"job_title": job_title, "job_description": job_description, "count": count}
+    )
+    fingerprint = role_fingerprint(job_title, job_description)
+    seen = set()
+    questions = []
+
+    for question in generated.questions:
+        key = re.sub(r"\W+", " ", question.question.lower()).strip()
+        if not is_valid_opening(question) or key in seen:
+            continue
+        seen.add(key)
+        questions.append(
+            OpeningQuestion(
+                role_fingerprint=fingerprint,
+                job_title=job_title,
+                type=question.type,
+                question=question.question.strip(),
+            )
+        )
+
+    return questions
@@ -1,6 +1,8 @@
+from redis import Redis
 from rq import Queue
-from ..db.redis import redis_client
+from ..config import settings
 
 SPEECT_TO_TEXT = "speech_to_text"
 
-stt_queue = Queue(SPEECT_TO_TEXT, redis_client)
+# rq workers only speak the sync redis protocol, so the queue keeps its own connection
+stt_queue = Queue(SPEECT_TO_TEXT, connection=Redis.from_url(settings.UPSTASH_REDIS_URL))
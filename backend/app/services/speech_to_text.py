@@ -1,59 +1,365 @@
-from io import BytesIO
+import asyncio
 import json
-import time
-from ..db.supabase import supabase_client
-import requests
+import multiprocessing
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Optional
+from urllib.parse import urlencode
+import websockets
+from pydantic import BaseModel
 from ..config import settings
+from .audio import SAMPLE_RATE, decode_mono
+from .http_client import (
+    SPEECHMATICS_HOST,
+    STREAM_CHUNK_SIZE,
+    get_http_client,
+    limit_stream,
+    request_with_retry,
+    stream_multipart,
+)
+from .storage import download_object, stream_object
 
-speechmatics_api_url = "https://eu1.asr.api.speechmatics.com/v2/jobs"
-headers = {"Authorization": f"Bearer {settings.SPEECHMATICS_API_KEY}"}
+EMPTY_TRANSCRIPT = "Can't evaluate your answer , please speak clearly"
+SPEECHMATICS_RT_URL = "wss://eu2.rt.speechmatics.com/v2"
+# local streaming re-transcribes the unsettled audio after this much new audio
+LOCAL_STREAM_STEP_BYTES = 48 * 1024
+# trailing audio whisper may still revise, anything older is settled for good
+LOCAL_STREAM_WINDOW_SECONDS = 10
 
 
-def poll_speechmatics_transcript(job_id, timeout=180, interval=3):
-    SPEECHMATICS_TRANSCRIPT_URL = (
-        "https://eu1.asr.api.speechmatics.com/v2/jobs/{job_id}/transcript?format=txt"
-    )
-    url = SPEECHMATICS_TRANSCRIPT_URL.format(job_id=job_id)
-    start = time.time()
+class SubmittedJob(BaseModel):
+    job_id: str
+    # set when the backend finished synchronously, otherwise the transcript
+    # arrives later through a callback or await_transcript
+    transcript: Optional[str] = None
 
-    while True:
-        res = requests.get(url, headers=headers)
+
+class TranscriptSegment(BaseModel):
+    # the whole transcript so far, not just the newest words
+    text: str
+    is_final: bool = False
+
+
+def join_transcript(parts: list[str]) -> str:
+    return " ".join("".join(parts).split())
+
+
+def join_words(parts: list[str]) -> str:
+    return " ".join(" ".join(parts).split())
+
+
+class SpeechToTextBackend(ABC):
+    name: str
+
+    @abstractmethod
+    async def submit(
+        self, audio_path: str, interview_id: str, source_path: Optional[str] = None
+    ) -> SubmittedJob:
+        """Starts transcribing `source_path` (defaults to `audio_path`), answer
+        statuses and callbacks stay keyed by `audio_path`."""
+
+    @abstractmethod
+    async def await_transcript(self, job_id: str) -> str:
+        """Transcript of a submitted job, raises TimeoutError while not ready."""
+
+    @abstractmethod
+    def stream(self, frames: AsyncIterator[bytes]) -> AsyncIterator[TranscriptSegment]:
+        """Transcribes audio while it is being recorded, yields the growing
+        transcript and ends with one `is_final` segment once `frames` is done."""
+
+    def close(self):
+        pass
+
+
+class SpeechmaticsBackend(SpeechToTextBackend):
+    name = "speechmatics"
+    api_url = f"{SPEECHMATICS_HOST}/v2/jobs"
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {settings.SPEECHMATICS_API_KEY}"}
+
+    def callback_url(self, interview_id: str, audio_path: str) -> str:
+        query = urlencode({"interview_id": interview_id, "audio_path": audio_path})
+        return f"{settings.BACKEND_URL}/transcription/speechmatics/callback?{query}"
+
+    async def submit(
+        self, audio_path: str, interview_id: str, source_path: Optional[str] = None
+    ) -> SubmittedJob:
+        config = {
+            "type": "transcription",
+            "transcription_config": {"language": "en"},
+            # speechmatics posts the plain transcript to us (appending ?id=&status=)
+            "notification_config": [
+                {
+                    "url": self.callback_url(interview_id, audio_path),
+                    "contents": ["transcript.txt"],
+                    "auth_headers": [
+                        f"Authorization: Bearer {settings.SPEECHMATICS_WEBHOOK_SECRET}"
+                    ],
+                }
+            ],
+        }
+
+        # relay storage -> speechmatics chunk by chunk, the recording is never held in memory
+        source_path = source_path or audio_path
+        async with stream_object("interviewly", source_path) as audio:
+            size = audio.headers.get("content-length")
+            if size is not None and int(size) > settings.MAX_AUDIO_UPLOAD_BYTES:
+                raise ValueError(f"Audio {source_path} exceeds the upload size limit")
+
+            multipart_headers, body = stream_multipart(
+                {"config": json.dumps(config)},
+                "data_file",
+                source_path,
+                "audio/webm",
+                limit_stream(
+                    audio.aiter_bytes(STREAM_CHUNK_SIZE),
+                    settings.MAX_AUDIO_UPLOAD_BYTES,
+                ),
+                size=int(size) if size is not None else None,
+            )
+            response = await get_http_client().post(
+                self.api_url,
+                headers={**self.headers, **multipart_headers},
+                content=body,
+            )
+        response.raise_for_status()
+        job_id = response.json().get("id")
+
+        if not job_id:
+            raise ValueError("No job_id in Speechmatics response")
+
+        return SubmittedJob(job_id=job_id)
+
+    async def await_transcript(self, job_id: str) -> str:
+        url = f"{self.api_url}/{job_id}/transcript?format=txt"
+        res = await request_with_retry("GET", url, headers=self.headers)
 
         if res.status_code == 200:
-            txt = res.text.strip()
-            if txt:
-                return txt
+            return res.text.strip() or EMPTY_TRANSCRIPT
+
+        if res.status_code in (202, 204, 404):
+            raise TimeoutError(
+                f"Speechmatics transcript not ready for job {job_id}, status {res.status_code}"
+            )
+
+        raise RuntimeError(
+            f"Unexpected transcript status: {res.status_code} {res.text}"
+        )
 
-        elif res.status_code in (202, 204, 404):
-            pass
+    async def stream(
+        self, frames: AsyncIterator[bytes]
+    ) -> AsyncIterator[TranscriptSegment]:
+        start = {
+            "message": "StartRecognition",
+            # browser chunks are webm/opus, speechmatics detects the container
+            "audio_format": {"type": "file"},
+            "transcription_config": {
+                "language": "en",
+                "enable_partials": True,
+                "max_delay": 1,
+            },
+        }
+        async with websockets.connect(
+            SPEECHMATICS_RT_URL, additional_headers=self.headers
+        ) as ws:
+            await ws.send(json.dumps(start))
+            # audio sent before the session is up gets dropped
+            while True:
+                message = json.loads(await ws.recv())
+                kind = message.get("message")
+                if kind == "RecognitionStarted":
+                    break
+                if kind == "Error":
+                    raise RuntimeError(
+                        f"Speechmatics realtime error: {message.get('reason')}"
+                    )
+
+            async def send_audio():
+                seq_no = 0
+                async for frame in frames:
+                    await ws.send(frame)
+                    seq_no += 1
+                await ws.send(
+                    json.dumps({"message": "EndOfStream", "last_seq_no": seq_no})
+                )
+
+            sender = asyncio.create_task(send_audio())
+            finals: list[str] = []
+            try:
+                async for raw in ws:
+                    message = json.loads(raw)
+                    kind = message.get("message")
+                    if kind == "AddTranscript":
+                        finals.append(message["metadata"]["transcript"])
+                        yield TranscriptSegment(text=join_transcript(finals))
+                    elif kind == "AddPartialTranscript":
+                        partial = message["metadata"]["transcript"]
+                        yield TranscriptSegment(
+                            text=join_transcript([*finals, partial])
+                        )
+                    elif kind == "EndOfTranscript":
+                        break
+                    elif kind == "Error":
+                        raise RuntimeError(
+                            f"Speechmatics realtime error: {message.get('reason')}"
+                        )
+                await sender
+            finally:
+                sender.cancel()
+
+        yield TranscriptSegment(text=join_transcript(finals), is_final=True)
+
+
+# one model per worker process, loaded by the pool initializer
+_local_model = None
+
+
+def load_local_model(model_path: str, compute_type: str):
+    global _local_model
+    from faster_whisper import WhisperModel
+
+    _local_model = WhisperModel(model_path, device="cpu", compute_type=compute_type)
+
+
+def transcribe_local(data: bytes) -> str:
+    segments, _ = _local_model.transcribe(decode_mono(data), language="en")
+    return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+def transcribe_local_window(
+    data: bytes, start: int, window: int
+) -> tuple[str, int, str]:
+    """Transcribes the samples from `start` on. Segments ending more than
+    `window` samples before the end come back settled, with the number of
+    samples they cover, the rest as the still changing tail."""
+    samples = decode_mono(data)[start:]
+    segments, _ = _local_model.transcribe(samples, language="en")
+    settle_before = (len(samples) - window) / SAMPLE_RATE
+    settled, tail, advanced = [], [], 0
+    for segment in segments:
+        if not tail and segment.end <= settle_before:
+            settled.append(segment.text.strip())
+            advanced = int(segment.end * SAMPLE_RATE)
         else:
-            raise RuntimeError(
-                f"Unexpected transcript status: {res.status_code} {res.text}"
+            tail.append(segment.text.strip())
+    return " ".join(settled), advanced, " ".join(tail)
+
+
+class LocalWhisperBackend(SpeechToTextBackend):
+    """Offline CPU transcription with a faster-whisper model directory on disk
+    (`uv sync --extra local-stt`). Jobs finish inside submit, no callback."""
+
+    name = "local"
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.LOCAL_STT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=load_local_model,
+                initargs=(
+                    settings.LOCAL_STT_MODEL_PATH,
+                    settings.LOCAL_STT_COMPUTE_TYPE,
+                ),
             )
+        return self._pool
+
+    async def submit(
+        self, audio_path: str, interview_id: str, source_path: Optional[str] = None
+    ) -> SubmittedJob:
+        data = await download_object("interviewly", source_path or audio_path)
+        transcript = await self.transcribe(data)
+        return SubmittedJob(
+            job_id=f"local-{uuid.uuid4().hex}",
+            transcript=transcript or EMPTY_TRANSCRIPT,
+        )
+
+    async def await_transcript(self, job_id: str) -> str:
+        raise RuntimeError(f"Local job {job_id} has no pending transcript")
+
+    async def run(self, fn, *args):
+        pool = self.pool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # a dead worker breaks the whole pool, replace it for the next job
+            if self._pool is pool:
+                self.close()
+            raise
+
+    async def transcribe(self, data: bytes) -> str:
+        return await self.run(transcribe_local, data)
+
+    async def transcribe_window(
+        self, data: bytes, start: int, window: int
+    ) -> tuple[str, int, str]:
+        return await self.run(transcribe_local_window, data, start, window)
+
+    async def stream(
+        self, frames: AsyncIterator[bytes]
+    ) -> AsyncIterator[TranscriptSegment]:
+        # whisper has no incremental mode, partials re-run only the audio after
+        # the settled segments (the container still decodes from the header)
+        window = LOCAL_STREAM_WINDOW_SECONDS * SAMPLE_RATE
+        buffer = bytearray()
+        transcribed_at = 0
+        settled: list[str] = []
+        offset = 0
+        async for frame in frames:
+            buffer.extend(frame)
+            if len(buffer) - transcribed_at < LOCAL_STREAM_STEP_BYTES:
+                continue
+
+            transcribed_at = len(buffer)
+            try:
+                text, advanced, tail = await self.transcribe_window(
+                    bytes(buffer), offset, window
+                )
+            except Exception as e:
+                # an unfinished container can fail to decode, the next step retries
+                print("Local partial transcription failed:", e)
+                continue
+            settled.append(text)
+            offset += advanced
+            yield TranscriptSegment(text=join_words([*settled, tail]))
+
+        if buffer:
+            text, _, tail = await self.transcribe_window(bytes(buffer), offset, 0)
+            settled.extend([text, tail])
+        yield TranscriptSegment(text=join_words(settled), is_final=True)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
 
-        if time.time() - start > timeout:
-            raise TimeoutError("Speechmatics transcript polling timed out")
 
-        time.sleep(interval)
+STT_BACKENDS = {
+    SpeechmaticsBackend.name: SpeechmaticsBackend,
+    LocalWhisperBackend.name: LocalWhisperBackend,
+}
+_backend: Optional[SpeechToTextBackend] = None
 
 
-def speech_to_text(data):
-    file_bytes = supabase_client.storage.from_("interviewly").download(data["path"])
-    files = {"data_file": (data["path"], BytesIO(file_bytes), "audio/wav")}
-    config = {"type": "transcription", "transcription_config": {"language": "en"}}
-    payload = {"config": json.dumps(config)}
-    response = requests.post(
-        speechmatics_api_url, headers=headers, files=files, data=payload
-    )
-    job_id = response.json()["id"]
-    transcript = poll_speechmatics_transcript(job_id=job_id, timeout=300, interval=3)
+def get_stt_backend() -> SpeechToTextBackend:
+    global _backend
+    if _backend is None:
+        if settings.STT_BACKEND not in STT_BACKENDS:
+            raise ValueError(f"Unknown STT_BACKEND {settings.STT_BACKEND!r}")
+        _backend = STT_BACKENDS[settings.STT_BACKEND]()
+    return _backend
 
-    ## evaultaon here
-    result = {
-        "transcription_job_id": job_id,
-        "audio_path": data["path"],
-        "transcript": transcript,
-    }
 
-    print(result)
-    return result
+def close_stt_backend():
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
@@ -0,0 +1,91 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, Callable, Optional
+from urllib.parse import quote
+import httpx
+from ..config import settings
+from .http_client import STREAM_CHUNK_SIZE, get_http_client, request_with_retry
+
+STORAGE_URL = f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1"
+storage_headers = {
+    "Authorization": f"Bearer {settings.SUPABASE_SECRET_KEY}",
+    "apikey": settings.SUPABASE_SECRET_KEY,
+}
+
+
+def object_url(bucket: str, path: str) -> str:
+    return f"{STORAGE_URL}/object/{bucket}/{quote(path)}"
+
+
+async def download_object(bucket: str, path: str) -> bytes:
+    response = await request_with_retry(
+        "GET", object_url(bucket, path), headers=storage_headers
+    )
+    response.raise_for_status()
+    return response.content
+
+
+def file_body(file: BinaryIO) -> Callable[[], AsyncIterator[bytes]]:
+    """Upload body factory over an open file, every attempt starts from the top.
+    Reads run in a thread so a file on disk never blocks the event loop."""
+
+    async def content() -> AsyncIterator[bytes]:
+        await asyncio.to_thread(file.seek, 0)
+        while chunk := await asyncio.to_thread(file.read, STREAM_CHUNK_SIZE):
+            yield chunk
+
+    return content
+
+
+async def upload_object_stream(
+    bucket: str,
+    path: str,
+    content_factory: Callable[[], AsyncIterator[bytes]],
+    size: Optional[int] = None,
+    content_type: str = "audio/webm",
+    upsert: bool = False,
+) -> str:
+    headers = {**storage_headers, "Content-Type": content_type}
+    if upsert:
+        headers["x-upsert"] = "true"
+    if size is not None:
+        headers["Content-Length"] = str(size)
+
+    response = await request_with_retry(
+        "POST",
+        object_url(bucket, path),
+        headers=headers,
+        content_factory=content_factory,
+    )
+    response.raise_for_status()
+    return path
+
+
+@asynccontextmanager
+async def stream_object(bucket: str, path: str) -> AsyncIterator[httpx.Response]:
+    async with get_http_client().stream(
+        "GET", object_url(bucket, path), headers=storage_headers
+    ) as response:
+        response.raise_for_status()
+        yield response
+
+
+async def create_signed_upload_url(bucket: str, path: str) -> str:
+    response = await request_with_retry(
+        "POST",
+        f"{STORAGE_URL}/object/upload/sign/{bucket}/{quote(path)}",
+        headers=storage_headers,
+    )
+    response.raise_for_status()
+    return f"{STORAGE_URL}/{response.json()['url'].lstrip('/')}"
+
+
+async def object_size(bucket: str, path: str) -> Optional[int]:
+    """Size of a stored object in bytes, None when it does not exist."""
+    response = await request_with_retry(
+        "HEAD", object_url(bucket, path), headers=storage_headers
+    )
+    if response.status_code in (400, 404):
+        return None
+    response.raise_for_status()
+    return int(response.headers.get("content-length", 0))
@@ -0,0 +1,22 @@
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services import audio
+
+
+class BrokenPool:
+    def submit(self, fn, *args):
+        raise BrokenProcessPool("A worker process terminated abruptly")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+async def test_broken_audio_pool_is_replaced(monkeypatch):
+    monkeypatch.setattr(audio, "_pool", BrokenPool())
+
+    with pytest.raises(BrokenProcessPool):
+        await audio.run_in_audio_pool(len, b"webm")
+
+    assert audio._pool is None
@@ -0,0 +1,24 @@
+from langchain_core.messages import HumanMessage
+
+from app.llm.config import InterviewQuestion
+from app.llm.gateway import GatedModel
+
+
+def test_schema_reaches_the_request_payload():
+    gated = GatedModel("interviewer", InterviewQuestion)
+
+    request = gated.model.bound._prepare_request(
+        [HumanMessage(content="hi")], **gated.model.kwargs
+    )
+
+    config = request["config"]
+    assert config.response_mime_type == "application/json"
+    assert config.response_json_schema == InterviewQuestion.model_json_schema()
+
+
+def test_plain_routes_are_not_constrained():
+    gated = GatedModel("interviewer")
+
+    request = gated.model._prepare_request([HumanMessage(content="hi")])
+
+    assert request["config"].response_json_schema is None
@@ -0,0 +1,35 @@
+import pytest
+
+from app.db.keys import meta_key
+from app.services import interview_meta
+from app.services.interview_meta import get_interview_meta, set_interview_meta
+
+INTERVIEW_ID = "meta-test"
+
+
+@pytest.fixture
+def subscribed(monkeypatch):
+    monkeypatch.setattr(interview_meta, "_subscribed", True)
+    monkeypatch.setattr(
+        interview_meta,
+        "_meta_cache",
+        interview_meta.TTLCache(maxsize=16, ttl=60),
+    )
+
+
+async def test_turn_fields_are_never_served_from_the_cache(fake_redis, subscribed):
+    await set_interview_meta(
+        INTERVIEW_ID,
+        {"candidate_name": "a@b.c", "question_no": 1, "last_question": "Q1"},
+    )
+    assert await get_interview_meta(INTERVIEW_ID) == {"candidate_name": "a@b.c"}
+
+    # another worker moves the interview on without this worker's cache hearing of it
+    await fake_redis.hset(
+        meta_key(INTERVIEW_ID), mapping={"question_no": 2, "last_question": "Q2"}
+    )
+
+    fresh = await get_interview_meta(INTERVIEW_ID, fresh=True)
+    assert fresh["last_question"] == "Q2"
+    assert fresh["question_no"] == "2"
+    assert "last_question" not in await get_interview_meta(INTERVIEW_ID)
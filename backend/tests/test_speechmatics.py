@@ -0,0 +1,225 @@
+import json
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.config import settings
+from app.db.keys import answer_status_key
+from app.inngest.functions import transcription
+from app.router.transcription import transcription_router
+from app.services import http_client, speech_to_text
+
+INTERVIEW_ID = "stt-test"
+AUDIO_PATH = f"audio/{INTERVIEW_ID}/1.webm"
+RECORDING = b"webm" * 1024
+
+
+class FakeSpeechmatics:
+    """Batch jobs api plus the storage object it reads, on one mock transport."""
+
+    def __init__(self):
+        self.jobs: dict[str, dict] = {}
+        self.transcripts: dict[str, str] = {}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        if request.method == "GET" and "/storage/v1/object/" in url:
+            return httpx.Response(200, content=RECORDING)
+
+        if (
+            request.method == "POST"
+            and url == speech_to_text.SpeechmaticsBackend.api_url
+        ):
+            body = (await request.aread()).decode("latin-1")
+            config = body.split('name="config"\r\n\r\n', 1)[1].split("\r\n--", 1)[0]
+            job_id = f"job-{len(self.jobs) + 1}"
+            self.jobs[job_id] = json.loads(config)
+            return httpx.Response(201, json={"id": job_id})
+
+        if request.method == "GET" and "/transcript" in url:
+            job_id = request.url.path.split("/")[-2]
+            if job_id not in self.transcripts:
+                return httpx.Response(404)
+            return httpx.Response(200, text=self.transcripts[job_id])
+
+        return httpx.Response(404)
+
+    def notification(self, job_id: str) -> dict:
+        return self.jobs[job_id]["notification_config"][0]
+
+
+@pytest.fixture
+def speechmatics(monkeypatch, fake_redis):
+    server = FakeSpeechmatics()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(server.handler))
+    monkeypatch.setattr(http_client, "_http_client", client)
+    monkeypatch.setattr(settings, "STT_BACKEND", "speechmatics")
+    monkeypatch.setattr(speech_to_text, "_backend", None)
+    return server
+
+
+@pytest.fixture
+def sent_events(monkeypatch):
+    events = []
+
+    async def send(event):
+        events.append(event)
+        return [f"event-{len(events)}"]
+
+    monkeypatch.setattr(transcription.inngest_client, "send", send)
+    return events
+
+
+async def statuses(fake_redis) -> list[str]:
+    entries = await fake_redis.xrange(answer_status_key(INTERVIEW_ID, AUDIO_PATH))
+    return [json.loads(fields["data"])["status"] for _, fields in entries]
+
+
+async def call_back(server: FakeSpeechmatics, job_id: str, status: str, **kwargs):
+    """Posts the notification the way speechmatics does, to the registered url."""
+    notification = server.notification(job_id)
+    callback = urlsplit(notification["url"])
+    name, _, value = notification["auth_headers"][0].partition(": ")
+    headers = kwargs.pop("headers", {name: value})
+
+    app = FastAPI()
+    app.include_router(transcription_router)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url=settings.BACKEND_URL
+    ) as client:
+        return await client.post(
+            f"{callback.path}?{callback.query}&id={job_id}&status={status}",
+            headers=headers,
+            content=kwargs.pop("transcript", "").encode(),
+        )
+
+
+async def test_submit_registers_an_authenticated_callback(speechmatics):
+    job = await speech_to_text.get_stt_backend().submit(AUDIO_PATH, INTERVIEW_ID)
+
+    notification = speechmatics.notification(job.job_id)
+    assert job.transcript is None
+    assert notification["url"].startswith(
+        f"{settings.BACKEND_URL}/transcription/speechmatics/callback?"
+    )
+    assert notification["contents"] == ["transcript.txt"]
+    assert notification["auth_headers"] == [
+        f"Authorization: Bearer {settings.SPEECHMATICS_WEBHOOK_SECRET}"
+    ]
+
+
+async def test_callback_publishes_the_transcript(speechmatics, sent_events, fake_redis):
+    job = await speech_to_text.get_stt_backend().submit(AUDIO_PATH, INTERVIEW_ID)
+
+    response = await call_back(speechmatics, job.job_id, "success", transcript="hi")
+
+    assert response.status_code == 200
+    assert [event.data["transcription"] for event in sent_events] == ["hi"]
+    assert sent_events[0].data["job_id"] == job.job_id
+    assert await statuses(fake_redis) == ["transcription_completed"]
+
+
+async def test_callback_rejects_a_wrong_secret(speechmatics, sent_events):
+    job = await speech_to_text.get_stt_backend().submit(AUDIO_PATH, INTERVIEW_ID)
+
+    response = await call_back(
+        speechmatics,
+        job.job_id,
+        "success",
+        headers={"Authorization": "Bearer wrong"},
+    )
+
+    assert response.status_code == 401
+    assert sent_events == []
+
+
+async def test_failed_job_marks_the_answer_as_error(
+    speechmatics, sent_events, fake_redis
+):
+    job = await speech_to_text.get_stt_backend().submit(AUDIO_PATH, INTERVIEW_ID)
+
+    response = await call_back(speechmatics, job.job_id, "rejected")
+
+    assert response.status_code == 200
+    assert sent_events == []
+    assert await statuses(fake_redis) == ["error"]
+
+
+async def test_a_job_is_only_published_once(fake_redis, sent_events):
+    first = await transcription.complete_transcription(
+        "job-1", INTERVIEW_ID, AUDIO_PATH, "hi"
+    )
+    second = await transcription.complete_transcription(
+        "job-1", INTERVIEW_ID, AUDIO_PATH, "hi"
+    )
+
+    assert (first, second) == (True, False)
+    assert len(sent_events) == 1
+    assert await statuses(fake_redis) == ["transcription_completed"]
+
+
+# the workflow body runs directly with its steps executed inline, the inngest
+# server's replay and memoization are not what these tests are about
+class FakeStep:
+    def __init__(self, event=None):
+        self.ran = []
+        self.event = event
+
+    async def run(self, step_id, handler, *args):
+        self.ran.append(step_id)
+        return await handler(*args)
+
+    async def wait_for_event(self, step_id, *, event, if_exp, timeout):
+        self.ran.append(step_id)
+        return self.event
+
+
+async def run_workflow(monkeypatch, step: FakeStep):
+    async def prepare_recording(bucket, path):
+        return {"has_speech": True, "audio_path": path}
+
+    monkeypatch.setattr(transcription, "prepare_recording", prepare_recording)
+    ctx = SimpleNamespace(
+        event=SimpleNamespace(
+            data={"interview_id": INTERVIEW_ID, "audio_path": AUDIO_PATH}
+        ),
+        step=step,
+    )
+    return await transcription.transcription_workflow._handler(ctx)
+
+
+async def test_missing_callback_falls_back_to_fetching(
+    monkeypatch, speechmatics, sent_events, fake_redis
+):
+    speechmatics.transcripts["job-1"] = "fetched answer"
+    step = FakeStep(event=None)
+
+    result = await run_workflow(monkeypatch, step)
+
+    assert result == {"job_id": "job-1", "published": True}
+    assert step.ran == [
+        "prepare-recording",
+        "submit-transcription",
+        "wait-for-transcript",
+        "fetch-transcript",
+        "publish-transcript",
+    ]
+    assert [event.data["transcription"] for event in sent_events] == ["fetched answer"]
+    assert await statuses(fake_redis) == [
+        "transcription_started",
+        "transcription_completed",
+    ]
+
+
+async def test_arrived_callback_skips_the_fetch(monkeypatch, speechmatics, sent_events):
+    completed = SimpleNamespace(data={"job_id": "job-1", "transcription": "hi"})
+    step = FakeStep(event=completed)
+
+    result = await run_workflow(monkeypatch, step)
+
+    assert result == completed.data
+    assert "fetch-transcript" not in step.ran
+    assert sent_events == []
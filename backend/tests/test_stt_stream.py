@@ -0,0 +1,85 @@
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services import speech_to_text
+from app.services.audio import SAMPLE_RATE
+
+
+class FakeRealtime:
+    """Speechmatics realtime socket that only announces the session after the
+    client already had a chance to send audio."""
+
+    def __init__(self):
+        self.sent: list = []
+        self.started = False
+        self.incoming = [
+            {"message": "Info", "type": "recognition_quality"},
+            {"message": "RecognitionStarted", "id": "session"},
+        ]
+
+    async def send(self, data):
+        if not isinstance(data, str):
+            assert self.started, "audio sent before RecognitionStarted"
+        self.sent.append(data)
+
+    async def recv(self):
+        message = self.incoming.pop(0)
+        self.started = message["message"] == "RecognitionStarted"
+        return json.dumps(message)
+
+    async def __aiter__(self):
+        yield json.dumps(
+            {"message": "AddTranscript", "metadata": {"transcript": "hello there"}}
+        )
+        yield json.dumps({"message": "EndOfTranscript"})
+
+
+async def test_realtime_waits_for_recognition_started(monkeypatch):
+    ws = FakeRealtime()
+
+    @asynccontextmanager
+    async def connect(url, additional_headers=None):
+        yield ws
+
+    monkeypatch.setattr(speech_to_text.websockets, "connect", connect)
+
+    async def frames():
+        yield b"audio"
+
+    backend = speech_to_text.SpeechmaticsBackend()
+    segments = [segment async for segment in backend.stream(frames())]
+
+    assert segments[-1].is_final and segments[-1].text == "hello there"
+    assert b"audio" in ws.sent
+
+
+def test_local_window_settles_segments_before_the_window(monkeypatch):
+    seen = []
+
+    def transcribe(samples, language):
+        seen.append(len(samples))
+        segments = [
+            SimpleNamespace(text=" one", end=4.0),
+            SimpleNamespace(text=" two", end=9.0),
+            SimpleNamespace(text=" three", end=11.0),
+        ]
+        return iter(segments), None
+
+    monkeypatch.setattr(
+        speech_to_text, "decode_mono", lambda data: np.zeros(12 * SAMPLE_RATE)
+    )
+    monkeypatch.setattr(
+        speech_to_text, "_local_model", SimpleNamespace(transcribe=transcribe)
+    )
+
+    settled, advanced, tail = speech_to_text.transcribe_local_window(
+        b"webm", 0, 5 * SAMPLE_RATE
+    )
+    assert (settled, advanced, tail) == ("one", 4 * SAMPLE_RATE, "two three")
+
+    # the next pass only hands whisper the audio after the settled segments
+    speech_to_text.transcribe_local_window(b"webm", advanced, 5 * SAMPLE_RATE)
+    assert seen == [12 * SAMPLE_RATE, 8 * SAMPLE_RATE]
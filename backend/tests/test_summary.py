@@ -0,0 +1,50 @@
+from app.config import settings
+from app.db.keys import summary_key, summary_lock_key
+from app.llm import summary
+from app.llm.transcript import TranscriptEntry
+
+SESSION_ID = "summary-test"
+
+
+def pending_entries() -> list[TranscriptEntry]:
+    count = settings.HISTORY_KEEP_EXCHANGES * 2 + 4
+    return [
+        TranscriptEntry(
+            id=f"{i + 1}-0", role="human" if i % 2 else "ai", text=f"message {i}"
+        )
+        for i in range(count)
+    ]
+
+
+async def test_compaction_keeps_a_lock_it_no_longer_holds(monkeypatch, fake_redis):
+    lock_key = summary_lock_key(SESSION_ID)
+
+    async def read_after(session_id, cursor):
+        return pending_entries()
+
+    class SlowChain:
+        async def ainvoke(self, inputs):
+            # our lock ran out mid-call and another worker took it over
+            await fake_redis.set(lock_key, "other-worker", ex=60)
+            return summary.ConversationSummary(
+                covered_topics=[], strengths=[], gaps=[], current_question_no=1
+            )
+
+    monkeypatch.setattr(summary, "read_after", read_after)
+    monkeypatch.setattr(summary, "summary_chain", SlowChain())
+
+    await summary.compact_history(SESSION_ID)
+
+    assert await fake_redis.get(lock_key) == "other-worker"
+    assert await fake_redis.hget(summary_key(SESSION_ID), "summarized_until")
+
+
+async def test_compaction_releases_its_own_lock(monkeypatch, fake_redis):
+    async def read_after(session_id, cursor):
+        return []
+
+    monkeypatch.setattr(summary, "read_after", read_after)
+
+    await summary.compact_history(SESSION_ID)
+
+    assert await fake_redis.get(summary_lock_key(SESSION_ID)) is None
@@ -0,0 +1,61 @@
+import asyncio
+
+from app.db.keys import transcript_key, turn_lock_key
+from app.llm import turns
+from app.services.interview_meta import get_interview_meta, set_interview_meta
+
+INTERVIEW_ID = "turns-test"
+
+
+def next_question(calls: list):
+    async def generate(state) -> dict:
+        calls.append(state.meta.get("last_question"))
+        number = int(state.meta.get("question_no", 0)) + 1
+        return {"question": f"Q{number}", "type": "theory", "question_no": number}
+
+    return generate
+
+
+async def answer(message: str, calls: list, client_id=None) -> dict:
+    meta = await get_interview_meta(INTERVIEW_ID, fresh=True)
+    turn_id = turns.message_turn_id(meta, message, client_id)
+    return await turns.run_turn_once(
+        INTERVIEW_ID, turn_id, next_question(calls), candidate_input=message
+    )
+
+
+async def test_double_submit_reuses_the_first_reply(fake_redis):
+    await set_interview_meta(INTERVIEW_ID, {"question_no": 1, "last_question": "Q1"})
+    calls = []
+
+    first = await answer("same answer", calls, client_id="answer-1")
+    again = await answer("same answer", calls, client_id="answer-1")
+
+    assert first == again
+    assert len(calls) == 1
+    assert await fake_redis.xlen(transcript_key(INTERVIEW_ID)) == 2
+
+
+async def test_same_text_for_the_next_question_is_a_new_turn(fake_redis):
+    await set_interview_meta(INTERVIEW_ID, {"question_no": 1, "last_question": "Q1"})
+    calls = []
+
+    first = await answer("I don't know", calls)
+    second = await answer("I don't know", calls)
+
+    assert first["question_no"] == 2
+    assert second["question_no"] == 3
+    assert calls == ["Q1", "Q2"]
+    assert await fake_redis.xlen(transcript_key(INTERVIEW_ID)) == 4
+
+
+async def test_turn_lock_outlives_its_ttl_while_the_turn_runs(monkeypatch, fake_redis):
+    monkeypatch.setattr(turns, "TURN_LOCK_SECONDS", 1)
+    lock_key = turn_lock_key(INTERVIEW_ID)
+
+    async with turns.single_flight(INTERVIEW_ID):
+        token = await fake_redis.get(lock_key)
+        await asyncio.sleep(1.5)
+        assert await fake_redis.get(lock_key) == token
+
+    assert await fake_redis.get(lock_key) is None
@@ -0,0 +1,42 @@
+import httpx
+from fastapi import FastAPI
+
+from app.config import settings
+from app.db.keys import chunk_counter_key
+from app.router.upload_files import upload_file_router
+from app.services.interview_meta import set_interview_meta
+from app.services.jwt_service import encode_jwt
+
+INTERVIEW_ID = "upload-test"
+
+
+async def post_upload(cookies: dict) -> httpx.Response:
+    app = FastAPI()
+    app.include_router(upload_file_router)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url=settings.BACKEND_URL,
+        cookies=cookies,
+    ) as client:
+        return await client.post(
+            "/upload/",
+            data={"interview_id": INTERVIEW_ID},
+            files={"file": ("1.webm", b"webm", "audio/webm")},
+        )
+
+
+async def test_direct_upload_needs_a_login(fake_redis):
+    response = await post_upload({})
+
+    assert response.status_code == 401
+    assert await fake_redis.get(chunk_counter_key(INTERVIEW_ID)) is None
+
+
+async def test_direct_upload_only_for_the_interview_owner(fake_redis):
+    await set_interview_meta(INTERVIEW_ID, {"candidate_name": "owner@example.com"})
+    token = encode_jwt({"email": "someone@example.com"})
+
+    response = await post_upload({"access_token": token})
+
+    assert response.status_code == 403
+    assert await fake_redis.get(chunk_counter_key(INTERVIEW_ID)) is None
@@ -21,6 +21,11 @@ import {
   Turn,
 } from '@/types/interview.types';
 
+// opt-in: send audio to the backend while recording instead of uploading it after
+const STREAM_TRANSCRIPTION =
+  process.env.NEXT_PUBLIC_STREAM_TRANSCRIPTION === 'true';
+const STREAM_TIMESLICE_MS = 250;
+
 const VoiceIndicator = ({ color = 'green' }: { color?: string }) => (
   <motion.div
     className={cn(
@@ -45,88 +50,78 @@ const VoiceIndicator = ({ color = 'green' }: { color?: string }) => (
   </motion.div>
 );
 
-const useAnswerEvaluationPolling = (
+const useAnswerEvaluationStream = (
   interviewId: string,
   audioPath: React.MutableRefObject<string | null>,
   onComplete: (data: any) => void,
   handleEvaluationStatus: (status: string) => void,
 ) => {
-  const pollingInterval = useRef<NodeJS.Timeout | null>(null);
-  const isPolling = useRef(false);
-  const abortController = useRef<AbortController | null>(null);
-
-  const stopPolling = useCallback(() => {
-    if (pollingInterval.current) {
-      clearInterval(pollingInterval.current);
-      pollingInterval.current = null;
-      isPolling.current = false;
-    }
+  const eventSource = useRef<EventSource | null>(null);
 
-    if (abortController.current) {
-      abortController.current.abort();
-      abortController.current = null;
+  const stopWatching = useCallback(() => {
+    if (eventSource.current) {
+      eventSource.current.close();
+      eventSource.current = null;
     }
   }, []);
 
-  const checkEvaluationStatus = useCallback(async () => {
-    if (!audioPath.current) {
-      stopPolling();
-      return;
-    }
-
-    try {
-      abortController.current = new AbortController();
-      const signal = abortController.current.signal;
-      const res = await api.get(`/interview/evaluation-status/`, {
-        params: {
-          interview_id: interviewId,
-          audio_path: encodeURIComponent(audioPath.current),
-        },
-        signal,
-      });
-
-      if (res.data.status === 'preparing_result') {
-        stopPolling();
+  const handleStatus = useCallback(
+    (data: any) => {
+      if (data.status === 'preparing_result') {
+        stopWatching();
         audioPath.current = null;
         window.location.href = `/dashboard/interview/${interviewId}`;
         return;
-      } else if (res.data.status === 'evaluation_completed') {
-        stopPolling();
+      } else if (data.status === 'evaluation_completed') {
+        stopWatching();
         audioPath.current = null;
-        onComplete(res.data);
-      } else if (res.data.status === 'error') {
-        stopPolling();
+        onComplete(data);
+      } else if (data.status === 'error') {
+        stopWatching();
         audioPath.current = null;
         onComplete('Unable to parse your response , can you  explain again');
       }
 
-      handleEvaluationStatus(res.data.status);
-    } catch (error) {
-      console.error('Error checking evaluation status:', error);
-    } finally {
-      abortController.current = null;
-    }
-  }, [interviewId, audioPath, onComplete, stopPolling]);
+      handleEvaluationStatus(data.status);
+    },
+    [interviewId, audioPath, onComplete, stopWatching],
+  );
 
-  const startPolling = useCallback(() => {
-    if (isPolling.current) {
+  // server pushes every status transition, no client side polling needed
+  const startWatching = useCallback(() => {
+    if (eventSource.current || !audioPath.current) {
       return;
     }
 
-    if (!audioPath.current) {
-      return;
-    }
+    const params = new URLSearchParams({
+      interview_id: interviewId,
+      audio_path: encodeURIComponent(audioPath.current),
+    });
+    const source = new EventSource(
+      `${process.env.NEXT_PUBLIC_BACKEND_URL}/interview/evaluation-status/stream?${params}`,
+      { withCredentials: true },
+    );
+
+    source.addEventListener('status', (e) => {
+      try {
+        handleStatus(JSON.parse((e as MessageEvent).data));
+      } catch (error) {
+        console.error('Error reading evaluation status:', error);
+      }
+    });
+    source.onerror = () => {
+      // stream ended by server after a final status, EventSource would reconnect
+      if (!audioPath.current) {
+        stopWatching();
+      }
+    };
 
-    isPolling.current = true;
-    checkEvaluationStatus();
+    eventSource.current = source;
+  }, [interviewId, audioPath, handleStatus, stopWatching]);
 
-    // Then poll every 2 seconds
-    pollingInterval.current = setInterval(() => {
-      checkEvaluationStatus();
-    }, 3000);
-  }, [checkEvaluationStatus, audioPath]);
+  useEffect(() => stopWatching, [stopWatching]);
 
-  return { startPolling, stopPolling, isPolling: isPolling.current };
+  return { startWatching, stopWatching };
 };
 
 const InterviewPage = ({
@@ -176,7 +171,7 @@ const InterviewPage = ({
     }
   };
 
-  const { startPolling, stopPolling } = useAnswerEvaluationPolling(
+  const { startWatching } = useAnswerEvaluationStream(
     interviewId,
     audioPath,
     handleEvaluationComplete,
@@ -252,14 +247,23 @@ const InterviewPage = ({
     try {
       setUploadFailed(false);
 
-      const formData = new FormData();
-      formData.append('file', blob, 'interview.webm');
-      formData.append('interview_id', interviewId);
+      // audio goes straight to storage, the api only signs and confirms it
+      const signedUpload = await api.post('/upload/signed-url', {
+        interview_id: interviewId,
+      });
+
+      const storageRes = await fetch(signedUpload.data.url, {
+        method: 'PUT',
+        body: blob,
+        headers: { 'Content-Type': 'audio/webm' },
+      });
+      if (!storageRes.ok) {
+        throw new Error('Upload failed');
+      }
 
-      const uploadAudioRes = await api({
-        method: 'POST',
-        data: formData,
-        url: '/upload',
+      const uploadAudioRes = await api.post('/upload/complete', {
+        interview_id: interviewId,
+        audio_path: signedUpload.data.audio_path,
       });
 
       if (!uploadAudioRes.data) {
@@ -268,7 +272,7 @@ const InterviewPage = ({
 
       audioPath.current = uploadAudioRes.data.audio_path;
       handleEvaluationStatus('Uploading audio');
-      startPolling();
+      startWatching();
     } catch (error) {
       toast('Audio upload failed. Please retry.');
       setUploadFailed(true);
@@ -276,12 +280,65 @@ const InterviewPage = ({
     }
   };
 
+  // streaming transcription, falls back to the upload flow if the socket fails
+  const streamSocket = useRef<WebSocket | null>(null);
+  const pendingFrames = useRef<Blob[]>([]);
+  const streamFinished = useRef(false);
+
+  const openTranscriptionStream = () => {
+    const url = `${process.env.NEXT_PUBLIC_BACKEND_URL}`.replace(/^http/, 'ws');
+    const socket = new WebSocket(`${url}/transcription/stream/${interviewId}`);
+    streamFinished.current = false;
+    pendingFrames.current = [];
+
+    socket.onopen = () => {
+      pendingFrames.current.forEach((frame) => socket.send(frame));
+      pendingFrames.current = [];
+    };
+    socket.onmessage = (e) => {
+      const data = JSON.parse(e.data);
+      if (data.type === 'started') {
+        audioPath.current = data.audio_path;
+      } else if (data.type === 'final') {
+        streamFinished.current = true;
+        handleEvaluationStatus('transcription_completed');
+        startWatching();
+      }
+    };
+    socket.onclose = () => {
+      streamSocket.current = null;
+      const recording =
+        recorder.current && recorder.current.state !== 'inactive';
+      if (!streamFinished.current && !recording && lastAudioBlob.current) {
+        uploadAudio(lastAudioBlob.current).catch((e) => console.log(e));
+      }
+    };
+
+    streamSocket.current = socket;
+  };
+
+  const sendFrame = (frame: Blob) => {
+    const socket = streamSocket.current;
+    if (!socket) return;
+    if (socket.readyState === WebSocket.CONNECTING) {
+      pendingFrames.current.push(frame);
+    } else if (socket.readyState === WebSocket.OPEN) {
+      socket.send(frame);
+    }
+  };
+
   const startRecording = async () => {
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
       recorder.current = new MediaRecorder(stream);
+      if (STREAM_TRANSCRIPTION) {
+        openTranscriptionStream();
+      }
       recorder.current.ondataavailable = (e) => {
-        if (e.data.size > 0) chunks.current.push(e.data);
+        if (e.data.size > 0) {
+          chunks.current.push(e.data);
+          sendFrame(e.data);
+        }
       };
 
       recorder.current.onstop = async () => {
@@ -292,6 +349,13 @@ const InterviewPage = ({
         chunks.current = [];
         stream.getTracks().forEach((track) => track.stop());
 
+        const socket = streamSocket.current;
+        if (socket && socket.readyState === WebSocket.OPEN) {
+          socket.send(JSON.stringify({ type: 'end' }));
+          handleEvaluationStatus('Transcribing answer');
+          return;
+        }
+
         try {
           await uploadAudio(blob);
         } catch (e) {
@@ -300,7 +364,9 @@ const InterviewPage = ({
       };
 
       setTurn(Turn.INTERVIEWEE);
-      recorder.current.start();
+      recorder.current.start(
+        STREAM_TRANSCRIPTION ? STREAM_TIMESLICE_MS : undefined,
+      );
     } catch (err) {
       console.error(err);
     }